@@ -1,4 +1,5 @@
-from dash import Dash, dcc, html, Input, Output, callback, ALL, Patch, clientside_callback, State, ctx
+from dash import Dash, dcc, html, Input, Output, callback, ALL, Patch, clientside_callback, State, ctx, no_update
+from flask import Response, request
 import plotly.graph_objects as go
 import plotly.express as px
 import plotly.io as pio
@@ -6,9 +7,26 @@ import dash_bootstrap_components as dbc
 import dash_ag_grid as dag
 import pandas as pd
 from get_data import GetData
-from tkinter import filedialog as fd
-#import easygui
+from session_state import SessionStore, make_backend, new_session_id
+from downsample import downsample_trace, x_range_from_relayout
+import figure_builder
+from figure_builder import curve_trace, style_figure
+from formula import evaluate_formula, FormulaError
+from grid_model import apply_filter_model, apply_sort_model, get_rows_response
+from metrics import registry, timed, StepTimer, BYTE_BUCKETS
+from coalesce import Coalescer, checkpoint
+from workspace import save_workspace, load_workspace, workspace_path, list_workspaces, WorkspaceError
+import os
+import json
+import logging
 import re
+import threading
+from collections import OrderedDict
+
+# DASH_PLT_LOG_LEVEL: DEBUG shows the selection and step timings of every plot update
+logging.basicConfig(level=os.environ.get('DASH_PLT_LOG_LEVEL', 'INFO'),
+                    format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+logger = logging.getLogger(__name__)
 
 pio.templates.default = 'plotly_white'
 app = Dash(__name__)#, external_stylesheets=[dbc.themes.COSMO])
@@ -23,7 +41,49 @@ config = {
 }
 
 # Initialization / first parameter to start
-data_reader = GetData()
+# set DASH_PLT_CACHE_DIR to keep parsed files as binary columns on disk between sessions
+# DASH_PLT_WORKERS / DASH_PLT_POOL ('thread' or 'process') configure the parallel loading of selected files
+data_reader = GetData(sidecar_dir=os.environ.get('DASH_PLT_CACHE_DIR'),
+                      max_workers=int(os.environ['DASH_PLT_WORKERS']) if os.environ.get('DASH_PLT_WORKERS') else None,
+                      pool=os.environ.get('DASH_PLT_POOL', 'thread'))
+# per-session state (files, selection, saved curves), DASH_PLT_SESSION_BACKEND: memory, disk:<folder> or redis://...
+# only the session id is stored in the browser
+sessions = SessionStore(make_backend(os.environ.get('DASH_PLT_SESSION_BACKEND', 'memory')))
+# plot updates of a session which are superseded by a newer one stop early, only the latest state is rendered
+coalescer = Coalescer()
+# factor and label fields of saved curves are applied on blur / Enter or after this typing pause (ms)
+input_debounce_ms = int(os.environ.get('DASH_PLT_INPUT_DEBOUNCE_MS', 600))
+# maximum number of points sent to the browser per trace (0: all points), zoomed ranges are re-sampled from the
+# full data
+points_per_trace = int(os.environ.get('DASH_PLT_POINTS_PER_TRACE', 4000))
+# traces with more points are drawn with WebGL
+figure_builder.webgl_threshold = int(os.environ.get('DASH_PLT_WEBGL_POINTS', figure_builder.webgl_threshold))
+
+# file browser: files are picked from the server below DASH_PLT_DATA_ROOT (default: working directory)
+data_root = os.path.realpath(os.environ.get('DASH_PLT_DATA_ROOT', os.getcwd()))
+# workspace snapshots (saved curves) are kept in DASH_PLT_WORKSPACE_DIR
+workspace_dir = os.environ.get('DASH_PLT_WORKSPACE_DIR',
+                               os.path.join(os.path.expanduser('~'), '.dash_plt', 'workspaces'))
+# maximum number of matches listed in the file browser, the search field narrows them down
+browser_max_options = 500
+# list the project tree once in the background so that the first search is answered from the index
+threading.Thread(target=data_reader.get_file_list_from_folder, args=(data_root, '**/*'), daemon=True).start()
+
+# metrics, served in the Prometheus text format on /metrics
+update_plot_steps = registry.histogram('dash_plt_update_plot_step_seconds', 'Duration of the steps of update_plot',
+                                       ['step'])
+response_bytes = registry.histogram('dash_plt_response_bytes', 'Size of callback responses (figure, grid rows, ...)',
+                                    ['callback'], BYTE_BUCKETS)
+registry.gauge('dash_plt_cache_bytes', 'Memory used by the parse cache', lambda: data_reader.cache_info()['bytes'])
+registry.gauge('dash_plt_cache_entries', 'Files in the parse cache', lambda: data_reader.cache_info()['entries'])
+
+
+def cache_hit_ratio():
+    info = data_reader.cache_info()
+    return info['hits'] / max(1, info['hits'] + info['misses'])
+
+
+registry.gauge('dash_plt_cache_hit_ratio', 'Hits / lookups of the parse cache since start', cache_hit_ratio)
 
 # Define the page components before the page is assembled
 # Header
@@ -31,20 +91,28 @@ header = html.H3(
     "Plot data", className="bg-primary text-white p-2 mb-2 text-center"
 )
 
-# Grid for data overview
+# Grid for data overview, rows are requested block by block from the server (infinite row model)
 grid = dag.AgGrid(
     id="grid",
     columnDefs=[],
-    rowData=[],
+    rowModelType="infinite",
     defaultColDef={"flex": 1, "minWidth": 120, "sortable": True, "resizable": True, "filter": True},
-    dashGridOptions={"rowSelection": "multiple"},
+    dashGridOptions={"rowSelection": "multiple", "cacheBlockSize": 200, "maxBlocksInCache": 20,
+                     "maxConcurrentDatasourceRequests": 1, "infiniteInitialRowCount": 1},
 )
 
 # Input form for data folder path
 path_input = html.Div(
     [
         html.P("Load data"),
-        dbc.Row([dbc.Col(dbc.Button('select files', id='button_upload_files', n_clicks=0), width=3),
+        # server side file browser: folder below the data root, glob pattern and search in the matches
+        dbc.Row([dbc.Col(dbc.Input(id='browser_folder', placeholder='folder (below data root)', size="sm",
+                                   debounce=True), width=7),
+                 dbc.Col(dbc.Input(id='browser_pattern', value='**/*.plt', size="sm", debounce=True), width=5), ]),
+        dcc.Dropdown(id='browser_files', options=[], value=[], multi=True, placeholder='search files',
+                     style={'font-size': 13, 'margin-top': '5px'}),
+        html.Div(id='browser_status', style={'font-size': 12}, className='text-muted mb-2'),
+        dbc.Row([dbc.Col(dbc.Button('add files', id='button_upload_files', n_clicks=0), width=3),
                  dbc.Col(dbc.Button("remove files", id="button_delete_files", n_clicks=0, color="warning")), ])
     ]
 )
@@ -60,6 +128,20 @@ save_button = html.Div(
     ],
 )
 
+# Save / load the saved curves as workspace snapshot on the server
+workspace_input = html.Div(
+    [
+        html.P("Workspace"),
+        dbc.Row([dbc.Col(dbc.Input(id='input_workspace_name', placeholder='workspace name', size="sm"), width=8),
+                 dbc.Col(dbc.Button('save', id='button_save_workspace', n_clicks=0, size="sm"), width=2), ]),
+        dbc.Row([dbc.Col(dcc.Dropdown(id='workspace_files', options=[], placeholder='saved workspaces',
+                                      style={'font-size': 13}), width=8),
+                 dbc.Col(dbc.Button('load', id='button_load_workspace', n_clicks=0, size="sm"), width=2), ],
+                className='mt-1'),
+        html.Div(id='workspace_status', style={'font-size': 12}, className='text-muted'),
+    ]
+)
+
 # Checklist for file selection
 file_checklist = html.Div(
     [
@@ -112,6 +194,9 @@ controls = html.Div([
     dbc.Card(
         dbc.CardBody(save_button), style={"margin-top": "15px"}
     ),
+    dbc.Card(
+        dbc.CardBody(workspace_input), style={"margin-top": "15px"}
+    ),
     dbc.Card(
         dbc.CardBody(file_checklist), style={"margin-top": "15px"}
     ),
@@ -128,7 +213,8 @@ plotting = html.Div([
     # Plot area
     dbc.Card(
         dbc.Tabs([
-            dbc.Tab([dcc.Graph(id="line-chart", figure=px.line(), config=config)], label="Line Chart"),
+            dbc.Tab([dcc.Graph(id="line-chart", figure=px.line(), config=config),
+                     dcc.Store(id='trace_count', data=0)], label="Line Chart"),
             dbc.Tab([grid], label="Data Table", className="p-4")
         ])
     ),
@@ -149,6 +235,8 @@ plotting = html.Div([
                          dbc.Switch(id="switch_y_rev", label="reverse y", value=False)], width=2),
                 dbc.Col([html.P('legend'), dbc.Switch(id="switch_legend", label="show legend", value=True),
                          ], width=2),
+                dbc.Col([html.P('live'), dbc.Switch(id="switch_live", label="follow files", value=False),
+                         dcc.Interval(id="interval_live", interval=2000, disabled=True)], width=2),
             ])
         ), style={"margin-top": "15px"}
     ),
@@ -184,54 +272,92 @@ plotting = html.Div([
 )
 
 # Put left side and right side together and finalize page
-app.layout = dbc.Container(
-    [
-        header,
-        dbc.Row([
-            dbc.Col([controls], width=4),
-            dbc.Col([plotting], width=8),
-        ]),
-    ],
-    fluid=True,
-    className="dbc dbc-ag-grid",
-)
+def serve_layout():
+    # new session id for every browser tab, kept over page reloads by the session storage
+    return dbc.Container(
+        [
+            dcc.Store(id='session_id', data=new_session_id(), storage_type='session'),
+            header,
+            dbc.Row([
+                dbc.Col([controls], width=4),
+                dbc.Col([plotting], width=8),
+            ]),
+        ],
+        fluid=True,
+        className="dbc dbc-ag-grid",
+    )
 
 
-def select_files():
-    filetypes = (('csv files', '*.csv'), ('plt files', '*.plt'), ('All files', '*.*'))
-    filenames = fd.askopenfilenames(
-        title='Open files',
-        initialdir='//depmdfsbackup/Backup/User/RRoe/OpenTCADProjects/',
-        filetypes=filetypes)
-    #filetypes = ['*.csv', '*.plt']
-    #filenames = easygui.fileopenbox(
-    #    title='Open files',
-    #    filetypes=filetypes,
-    #    multiple=True
-    #)
-    return filenames
+app.layout = serve_layout
+
+
+def browser_folder_path(folder):
+    # absolute path of a folder given relative to the data root, None if it is outside of the data root
+    path = os.path.realpath(os.path.join(data_root, folder or ''))
+    if os.path.commonpath([path, data_root]) != data_root:
+        return None
+    return path
+
+
+@callback(
+    Output('browser_files', 'options'),
+    Output('browser_status', 'children'),
+    Input('browser_folder', 'value'),
+    Input('browser_pattern', 'value'),
+    Input('browser_files', 'search_value'),
+    State('browser_files', 'value'),
+)
+@timed('update_browser')
+def update_browser(folder, pattern, search_value, selected):
+    # matches come from the cached folder listings, only folders which changed since the last search are read again
+    folder_path = browser_folder_path(folder)
+    if folder_path is None or not os.path.isdir(folder_path):
+        return [{'label': os.path.relpath(f, data_root), 'value': f} for f in selected or []], 'folder not found'
+    try:
+        matches = data_reader.file_index.glob(folder_path, pattern or '**/*')
+    except re.error:
+        return [{'label': os.path.relpath(f, data_root), 'value': f} for f in selected or []], 'invalid pattern'
+    if search_value:
+        words = search_value.lower().split()
+        matches = [m for m in matches if all(w in m[0].lower() for w in words)]
+    options = [{'label': f'{path} ({size / 1024 ** 2:.1f} MB)', 'value': os.path.join(folder_path, path)}
+               for path, size, mtime_ns in matches[:browser_max_options]]
+    # selected files stay in the options, otherwise the dropdown drops them
+    listed = {option['value'] for option in options}
+    options += [{'label': os.path.relpath(f, data_root), 'value': f} for f in selected or [] if f not in listed]
+    if len(matches) > browser_max_options:
+        return options, f'{len(matches)} files, first {browser_max_options} listed, search to narrow down'
+    return options, f'{len(matches)} files'
 
 
 @callback(
     Output("file_use", "options"),
     Output("file_use", "value"),
+    Output('browser_files', 'value'),
     Input('button_upload_files', 'n_clicks'),
     Input('button_delete_files', 'n_clicks'),
+    State('browser_files', 'value'),
+    State('session_id', 'data'),
     prevent_initial_call=True
 )
-def update_folder(b1, b2):
+@timed('update_folder')
+@sessions.with_state()
+def update_folder(b1, b2, browser_files, state):
     triggered_id = ctx.triggered_id
     if triggered_id == 'button_delete_files':
-        data_reader.file_list = []
-        data_reader.file_list_short = []
-        data_reader.current_item_container = []
-        return [], []
-    file_list, file_list_short = data_reader.save_file_to_file_list(list(select_files()))
+        state.file_list = []
+        state.file_list_short = []
+        state.current_item_container = []
+        return [], [], no_update
+    # only existing .plt / .csv files below the data root are accepted
+    files = [f for f in browser_files or [] if f.split('.')[-1] in ('plt', 'csv')
+             and browser_folder_path(f) is not None and os.path.isfile(f)]
+    file_list, file_list_short = state.save_file_to_file_list(files, root=data_root)
     if not file_list:
-        return [], []
-    print('collected files:', file_list)
-    print('collected files_short:', file_list_short)
-    return file_list_short, []
+        return [], [], []
+    logger.info('collected %d files', len(file_list))
+    logger.debug('collected files: %s', file_list)
+    return file_list_short, [], []
 
 
 @callback(
@@ -239,28 +365,58 @@ def update_folder(b1, b2):
     Output("columns_y", 'options'),
     Output("columns_x", 'value'),
     Output("columns_y", 'value'),
-    Input('file_use', 'value')
+    Input('file_use', 'value'),
+    State('session_id', 'data'),
 )
-def update_columns(file_use):
+@timed('update_columns')
+@sessions.with_state()
+def update_columns(file_use, state):
     if not file_use:
-        print('no x/y columns to read')
+        logger.debug('no x/y columns to read')
         # delete items from current_item_container to ensure no information is saved after deselecting files
-        data_reader.current_item_container = []
+        state.current_item_container = []
         return [], [], '', ''
-    file_list = data_reader.file_list
-    file_list_short = data_reader.file_list_short
+    file_list = state.file_list
+    file_list_short = state.file_list_short
     col = []
     for f in file_use:
-        xy = data_reader.parse_file(file_list[file_list_short.index(f)])
-        cols = xy.columns.to_list()
+        # only the file header is read, the data itself is parsed on plotting
+        try:
+            cols = data_reader.get_columns(file_list[file_list_short.index(f)])
+        except (OSError, ValueError) as e:
+            logger.warning('could not read columns: %s: %s', f, e)
+            cols = []
         if len(col) == 0:
             col = cols
         else:
             # keep only pd.DF columns which are named identically
             col = [value for value in cols if value in col]
+    if len(col) == 0:
+        logger.debug('no common x/y columns in %s', file_use)
+        return [], [], '', ''
     return col, col, col[0], col[0]
 
 
+# read data_container and prepare the input fields for plot modification
+def prepare_input_form_for_plot(state):
+    # factors and labels are taken from the saved curve so that they survive a re-render of the form
+    modify_files_list = [dbc.Row([dbc.Col([dbc.Input(id={'type': 'input', 'index': c.name + '_x'},
+                                                     size="sm", type='number', value=c.x_factor,
+                                                     debounce=input_debounce_ms), ], width=1),
+                                  dbc.Col([dbc.Input(id={'type': 'input', 'index': c.name + '_y'},
+                                                     size="sm", type='number', value=c.y_factor,
+                                                     debounce=input_debounce_ms), ], width=1),
+                                  dbc.Col([dbc.Input(id={'type': 'input', 'index': c.name + '_label'},
+                                                     size="sm", type='text', value=c.label,
+                                                     debounce=input_debounce_ms), ], width=3),
+                                  dbc.Col(c.identifier, width=1), dbc.Col(c.name, width=5),
+                                  dbc.Col([dbc.Button('del ' + c.identifier,
+                                                      id={'type': 'button', 'index': c.name + '_delete'},
+                                                      n_clicks=0, size="sm", color="warning")], width=1), ])
+                         for c in state.data_container]
+    return modify_files_list
+
+
 @callback(
     Output("files_saved_to_container", 'children'),
     Output("modify_files", 'children'),
@@ -268,201 +424,429 @@ def update_columns(file_use):
     Input("button_delete_container", 'n_clicks'),
     # calculate new curve with curve identifier
     Input('button_new_curve_calc', 'n_clicks'),
-    Input('input_new_curve_formula', 'value'),
     Input({'type': 'button', 'index': ALL}, 'n_clicks'),
-    prevent_initial_call=True
+    # the formula is only read when the button is clicked
+    State('input_new_curve_formula', 'value'),
+    # page load: the form is built from the curves saved in the session, e.g. after a reload
+    Input('session_id', 'data'),
 )
-def modify_container(b1, b2, b3, input_formula, button_values):
+@timed('modify_container')
+@sessions.with_state()
+def modify_container(b1, b2, b3, button_values, input_formula, state):
     triggered_id = ctx.triggered_id
-    # read data_container and prepare the input fields for plot modification
-    def prepare_input_form_for_plot():
-        modify_files_list = [dbc.Row([dbc.Col([dbc.Input(id={'type': 'input', 'index': x[0] + '_x'},
-                                                         size="sm", type='number', value=1), ], width=1),
-                                      dbc.Col([dbc.Input(id={'type': 'input', 'index': x[0] + '_y'},
-                                                         size="sm", type='number', value=1), ], width=1),
-                                      dbc.Col([dbc.Input(id={'type': 'input', 'index': x[0] + '_label'},
-                                                         size="sm", type='text', value=x[0]), ], width=3),
-                                      dbc.Col(x[1], width=1), dbc.Col(x[0], width=5),
-                                      dbc.Col([dbc.Button('del ' + x[1], id={'type': 'button', 'index': x[0] + '_delete'},
-                                                      n_clicks=0, size="sm", color="warning")], width=1), ])
-                             for x in
-                             zip(data_reader.data_container['file'], data_reader.data_container['curve_identifier'])]
-        return modify_files_list
-
+    if not triggered_id or triggered_id == 'session_id':
+        if len(state.data_container) == 0:
+            return 'no data yet', []
+        return f"saved: {state.data_container.names()}", prepare_input_form_for_plot(state)
     # remove dataset from data_container if delete-button is clicked (clicked == 1)
     if 1 in button_values:
-        for i, val in enumerate(button_values):
+        # buttons are in the same order as the saved curves
+        for identifier, val in zip(state.data_container.identifiers(), button_values):
             if val == 1:
-                print('delete: ', i, data_reader.data_container['file'][i])
-                del data_reader.data_container['x'][i]
-                del data_reader.data_container['y'][i]
-                del data_reader.data_container['file'][i]
-                del data_reader.data_container['curve_identifier'][i]
-        if len(data_reader.data_container['file']) == 0:
+                logger.info('delete curve %s (%s)', identifier, state.data_container.get(identifier).name)
+                state.data_container.remove(identifier)
+        if len(state.data_container) == 0:
             return 'no data yet', []
-        return f"saved: {data_reader.data_container['file']}", prepare_input_form_for_plot()
+        return f"saved: {state.data_container.names()}", prepare_input_form_for_plot(state)
 
     if triggered_id == 'button_delete_container':
-        data_reader.data_container = {'x': [], 'y': [], 'file': [], 'curve_identifier': []}
-        data_reader.current_item_container = []
-        data_reader.curve_save_counter = 1
+        state.data_container.clear()
+        state.current_item_container = []
+        state.curve_save_counter = 1
         return 'no data yet', []
 
     if triggered_id == 'button_save_to_container':
-        item = data_reader.current_item_container  # item = [[selected files] , colX, colY]
-        file_list = data_reader.file_list
-        file_list_short = data_reader.file_list_short
+        item = state.current_item_container  # item = [[selected files] , colX, colY]
         # add all selected files to data_container to save them for later
         if len(item) > 0:
-            for file in item[0]:
-                if file + '_' + item[2] not in data_reader.data_container['file']:
-                    xy = data_reader.parse_file(file_list[file_list_short.index(file)])
-                    data_reader.data_container['file'].append(file + '_' + item[2])
-                    data_reader.data_container['x'].append(list(xy[item[1]]))
-                    data_reader.data_container['y'].append(list(xy[item[2]]))
-                    data_reader.data_container['curve_identifier'].append(f'C{data_reader.curve_save_counter}')
-                    data_reader.curve_save_counter += 1
-        return f"saved: {data_reader.data_container['file']}", prepare_input_form_for_plot()
+            files = [file for file in item[0] if state.data_container.get_by_name(file + '_' + item[2]) is None]
+            frames, errors = data_reader.parse_files([state.file_path(file) for file in files],
+                                                     columns=[item[1], item[2]])
+            for file, xy in zip(files, frames):
+                if xy is not None:
+                    state.data_container.add(f'C{state.curve_save_counter}', file + '_' + item[2],
+                                             xy[item[1]].to_numpy(), xy[item[2]].to_numpy(), build_index=True)
+                    state.curve_save_counter += 1
+            for file, e in errors.items():
+                logger.warning('could not read file: %s: %s', file, e)
+        return f"saved: {state.data_container.names()}", prepare_input_form_for_plot(state)
 
     if triggered_id == 'button_new_curve_calc':
         if input_formula is None or len(input_formula) == 0:
-            if len(data_reader.data_container['file']) == 0:
+            if len(state.data_container) == 0:
                 return 'no data yet', []
-            return f"saved: {data_reader.data_container['file']}", prepare_input_form_for_plot()
-
-        curve_ident_calculation = re.findall(r'C\d+', input_formula)  # detect curve identifier for calculation
-        print('formula: ', input_formula, 'saved identifier: ', data_reader.data_container['curve_identifier'],
-              'found curve ident: ', curve_ident_calculation)
-        if len(curve_ident_calculation) == 0:
-            print("No curve ident found in formula")
-            return f"saved: {data_reader.data_container['file']}", prepare_input_form_for_plot()
-
-        # replace C1, C2,.. parameter in formula to get correct data from data_container
-        for parameter in curve_ident_calculation:
-            try:
-                index = data_reader.data_container['curve_identifier'].index(parameter)
-                input_formula = input_formula.replace(parameter, f'data_reader.data_container["y"][{index}][i]')
-            # error if e.g. curve is called which does not exist
-            except Exception as e:
-                print("Error during data loading for curve calculation:", e)
-                return f"saved: {data_reader.data_container['file']}", prepare_input_form_for_plot()
-
-        # point-wise calculation of curve values and plot result
-        first_index = data_reader.data_container['curve_identifier'].index(curve_ident_calculation[0])
-        results = []
-        for i in range(len(data_reader.data_container['y'][first_index])):
-            try:
-                res = eval(input_formula)
-                results.append(res)
-            except Exception as e:
-                print("Error during curve calculation:", e)
-                return f"saved: {data_reader.data_container['file']}", prepare_input_form_for_plot()
-
-        data_reader.data_container['file'].append(f'C{data_reader.curve_save_counter}_calculation')
-        data_reader.data_container['x'].append(data_reader.data_container['x'][first_index])
-        data_reader.data_container['y'].append(results)
-        data_reader.data_container['curve_identifier'].append(f'C{data_reader.curve_save_counter}')
-        data_reader.curve_save_counter += 1
-        return f"saved: {data_reader.data_container['file']}", prepare_input_form_for_plot()
-
-    if len(input_formula) >= 0:
-        if len(data_reader.data_container['file']) == 0:
-            return 'no data yet', []
-        return f"saved: {data_reader.data_container['file']}", prepare_input_form_for_plot()
+            return f"saved: {state.data_container.names()}", prepare_input_form_for_plot(state)
+
+        # formula is parsed once and evaluated on the whole curves, curves on a different x grid are interpolated
+        # onto the x values of the first curve in the formula
+        logger.info('formula: %s', input_formula)
+        try:
+            x_result, y_result = evaluate_formula(input_formula, state.data_container)
+        except FormulaError as e:
+            logger.warning('error during curve calculation: %s: %s', input_formula, e)
+            return f"saved: {state.data_container.names()}", prepare_input_form_for_plot(state)
+
+        state.data_container.add(f'C{state.curve_save_counter}',
+                                 f'C{state.curve_save_counter}_calculation', x_result, y_result, build_index=True)
+        state.curve_save_counter += 1
+        return f"saved: {state.data_container.names()}", prepare_input_form_for_plot(state)
+
+    return no_update, no_update
+
+
+@callback(
+    Output("files_saved_to_container", 'children', allow_duplicate=True),
+    Output("modify_files", 'children', allow_duplicate=True),
+    Output('workspace_status', 'children'),
+    Input('button_save_workspace', 'n_clicks'),
+    Input('button_load_workspace', 'n_clicks'),
+    State('input_workspace_name', 'value'),
+    State('workspace_files', 'value'),
+    State('session_id', 'data'),
+    prevent_initial_call=True
+)
+@timed('manage_workspace')
+@sessions.with_state()
+def manage_workspace(b1, b2, workspace_name, workspace_selected, state):
+    # snapshot of the saved curves (identifiers, names, labels, factors, curve counter) in one binary file,
+    # loading memory maps the file instead of reading it
+    triggered_id = ctx.triggered_id
+    try:
+        if triggered_id == 'button_save_workspace':
+            filename = workspace_path(workspace_dir, workspace_name or '')
+            os.makedirs(workspace_dir, exist_ok=True)
+            nbytes = save_workspace(filename, state.data_container, state.curve_save_counter)
+            logger.info('workspace saved: %s (%d curves, %d bytes)', filename, len(state.data_container), nbytes)
+            return no_update, no_update, f'saved {len(state.data_container)} curves ({nbytes / 1024 ** 2:.1f} MB)'
+        if not workspace_selected:
+            return no_update, no_update, 'no workspace selected'
+        filename = workspace_path(workspace_dir, workspace_selected)
+        state.data_container, state.curve_save_counter = load_workspace(filename)
+    except (OSError, WorkspaceError) as e:
+        logger.warning('workspace: %s', e)
+        return no_update, no_update, f'workspace error: {e}'
+    logger.info('workspace loaded: %s (%d curves)', filename, len(state.data_container))
+    status = f'loaded {len(state.data_container)} curves'
+    if len(state.data_container) == 0:
+        return 'no data yet', [], status
+    return f"saved: {state.data_container.names()}", prepare_input_form_for_plot(state), status
+
+
+@callback(
+    Output('workspace_files', 'options'),
+    Input('workspace_status', 'children'),
+)
+def update_workspace_list(status):
+    # list again after every save / load
+    return list_workspaces(workspace_dir)
 
 
 @callback(
     Output("line-chart", "figure"),
-    Output("grid", "rowData"),
     Output("grid", "columnDefs"),
+    Output('trace_count', 'data'),
     # read files from
     Input('file_use', 'value'),
     Input('columns_x', 'value'),
     Input('columns_y', 'value'),
-    # update plot functions
-    Input('input_x_label', 'value'),
-    Input('input_y_label', 'value'),
-    Input('input_plot_label', 'value'),
-    Input('radio_items_plot_style', 'value'),
-    Input('switch_x_log', 'value'),
-    Input('switch_y_log', 'value'),
-    Input('switch_x_rev', 'value'),
-    Input('switch_y_rev', 'value'),
-    Input('switch_legend', 'value'),
     # data manipulation
     Input({'type': 'input', 'index': ALL}, 'value'),
+    # zoom / pan
+    Input('line-chart', 'relayoutData'),
+    # plot style, changes are applied by update_plot_style without rebuilding the traces
+    State('input_x_label', 'value'),
+    State('input_y_label', 'value'),
+    State('input_plot_label', 'value'),
+    State('radio_items_plot_style', 'value'),
+    State('switch_x_log', 'value'),
+    State('switch_y_log', 'value'),
+    State('switch_x_rev', 'value'),
+    State('switch_y_rev', 'value'),
+    State('switch_legend', 'value'),
+    # live mode: the read positions after the plotted rows are only needed while it is on
+    State('switch_live', 'value'),
+    State('session_id', 'data'),
 )
-def update_plot(file_use, x, y, input_x_label, input_y_label, input_plot_label, radio_items_plot_style,
-                switch_x_log, switch_y_log, switch_x_rev, switch_y_rev, switch_legend, input_values):
+@timed('update_plot')
+@coalescer.latest_only('update_plot')
+@sessions.with_state()
+def update_plot(file_use, x, y, input_values, relayout_data, input_x_label, input_y_label, input_plot_label,
+                radio_items_plot_style, switch_x_log, switch_y_log, switch_x_rev, switch_y_rev, switch_legend,
+                switch_live, state):
     triggered_id = ctx.triggered_id
-    if len(data_reader.data_container['file']) == 0:
+    # on zoom only the traces are re-sampled for the visible x-range, autorange re-samples the full data
+    x_range = None
+    zoom = {}
+    if triggered_id == 'line-chart':
+        x_range = x_range_from_relayout(relayout_data, switch_x_log)
+        if x_range is None and not relayout_data.get('xaxis.autorange'):
+            return no_update, no_update, no_update
+        for axis in ['xaxis', 'yaxis']:
+            if f'{axis}.range[0]' in relayout_data:
+                zoom[axis] = [relayout_data[f'{axis}.range[0]'], relayout_data[f'{axis}.range[1]']]
+    if len(state.data_container) == 0:
         if not file_use or x == '' or y == '':
-            print('no files selected to update plot')
-            return {}, [], []
+            logger.debug('no files selected to update plot')
+            return {}, [], 0
 
-    data_plot = pd.DataFrame()
+    timer = StepTimer(update_plot_steps)
     # read data from active click
     if len(file_use) > 0:
-        file_list = data_reader.file_list
-        file_list_short = data_reader.file_list_short
-        for f in file_use:
-            xy = data_reader.parse_file(file_list[file_list_short.index(f)])
-            data_plot = pd.concat([data_plot, xy])
-        data_reader.current_item_container = [file_use, x, y]
-        print('current item container: \n', data_reader.current_item_container)
+        # only the plotted columns are parsed, every file stays in its own frame
+        with timer.step('load'):
+            data_plot, errors = data_reader.load_files([state.file_path(f) for f in file_use], columns=[x, y])
+        # a newer update of this session arrived meanwhile: stop before the session state is changed
+        checkpoint()
+        for file, e in errors.items():
+            logger.warning('could not read file: %s: %s', file, e)
+        # live mode continues after the rows plotted now, the trace of a file is its position in the selection (the
+        # file traces are added first). With live mode off the file is not read again, if the parse does not tell
+        # where it stopped only the number of plotted rows is kept and follow_files counts them when live mode is on
+        state.follow = {}
+        with timer.step('follow'):
+            for trace, (file, xy) in enumerate(data_plot):
+                try:
+                    position = data_reader.follow_position(file, xy, count_rows=switch_live)
+                except (OSError, ValueError) as e:
+                    logger.warning('could not follow file: %s: %s', file, e)
+                    continue
+                state.follow[file] = dict(position or {'rows': len(xy)}, trace=trace)
+        state.current_item_container = [file_use, x, y]
 
     fig = go.Figure()
     count_plot_color = 0
     # plot current selected file - column combination
     if len(file_use) > 0:
-        print('instant_plot')
-        for i, file in enumerate(data_plot['file'].unique()):
-            fig.add_trace(
-                go.Scatter(x=data_plot[data_plot['file'] == file][x], y=data_plot[data_plot['file'] == file][y],
-                           mode=radio_items_plot_style, name=file.split('/')[-1],
-                           line=dict(color=px.colors.qualitative.D3[i])))
-            count_plot_color += 1
+        # traces are named by the short names of the session, a.plt of two runs gets two legend entries
+        short_names = {state.file_path(f): f for f in file_use}
+        with timer.step('traces'):
+            for file, xy in data_plot:
+                name = short_names.get(file, os.path.relpath(file, data_root))
+                fig.add_trace(curve_trace(xy[x].to_numpy(), xy[y].to_numpy(), name, count_plot_color,
+                                          radio_items_plot_style, points_per_trace, x_range))
+                count_plot_color += 1
 
     # plot saved data from data_container
-    if len(data_reader.data_container['file']) > 0:
-        print('saved_plot')
-        print(input_values)
-        for i, file in enumerate(data_reader.data_container['file']):
-            if input_values[3 * i] is None:
-                input_values[3 * i] = 1
-            x_data_manipulated = [x * input_values[3 * i] for x in data_reader.data_container['x'][i]]
-            if input_values[3 * i + 1] is None:
-                input_values[3 * i + 1] = 1
-            y_data_manipulated = [x * input_values[3 * i + 1] for x in data_reader.data_container['y'][i]]
-            plot_label = input_values[3 * i + 2]
-            fig.add_trace(go.Scatter(x=x_data_manipulated, y=y_data_manipulated, mode=radio_items_plot_style,
-                                     name=plot_label, line=dict(color=px.colors.qualitative.D3[count_plot_color])))
-            count_plot_color += 1
-
-    fig.update_layout(xaxis=dict(showexponent='all', exponentformat='e'))
-    fig.update_layout(yaxis=dict(showexponent='all', exponentformat='e'))
-    fig.update_layout(
-        template='ggplot2')  # "plotly", "plotly_white", "plotly_dark", "ggplot2", "seaborn", "simple_white"
-
-    if switch_x_rev:
-        fig.update_xaxes(autorange="reversed")
-    if switch_y_rev:
-        fig.update_yaxes(autorange="reversed")
-    if input_x_label:
-        fig.update_xaxes(title_text=input_x_label)
-    if input_y_label:
-        fig.update_yaxes(title_text=input_y_label)
-    if switch_x_log:
-        fig.update_xaxes(type="log")
-    if switch_y_log:
-        fig.update_yaxes(type="log")
-
-    if not switch_legend:
-        fig.update_layout(showlegend=False)
-
-    fig.update_layout(title={'text': input_plot_label, 'y': 0.95, 'x': 0.4}, height=800)
-
-    return fig, data_plot.to_dict("records"), [{"field": i} for i in data_plot.columns]
+    if len(state.data_container) > 0:
+        with timer.step('saved_traces'):
+            for i, curve in enumerate(state.data_container):
+                # the form may not show all saved curves yet (e.g. right after a page reload), then the stored
+                # factors and label of the curve are used
+                if 3 * i + 2 < len(input_values):
+                    if input_values[3 * i] is None:
+                        input_values[3 * i] = 1
+                    if input_values[3 * i + 1] is None:
+                        input_values[3 * i + 1] = 1
+                    curve.x_factor, curve.y_factor, curve.label = input_values[3 * i:3 * i + 3]
+                # visible points of the saved curve from its min/max index
+                x_data_manipulated, y_data_manipulated = curve.viewport(x_range, points_per_trace)
+                fig.add_trace(curve_trace(x_data_manipulated, y_data_manipulated, curve.label, count_plot_color,
+                                          radio_items_plot_style))
+                count_plot_color += 1
+
+    checkpoint()
+    with timer.step('layout'):
+        # keep the zoomed view after re-sampling
+        style_figure(fig, input_x_label, input_y_label, input_plot_label, switch_x_log, switch_y_log, switch_x_rev,
+                     switch_y_rev, switch_legend, zoom)
+
+    if triggered_id == 'line-chart':
+        logger.debug('update_plot (zoom): %d files, %d saved curves, x=%s, y=%s: %s', len(file_use),
+                     len(state.data_container), x, y, timer.summary())
+        return fig, no_update, len(fig.data)
+    # the grid rows themselves are only created on request by update_grid_rows, columns from the file headers
+    with timer.step('columns'):
+        grid_columns = []
+        for f in file_use:
+            grid_columns += [c for c in data_reader.get_columns(state.file_path(f)) if c not in grid_columns]
+        column_defs = [{"field": i, "filter": "agNumberColumnFilter"} for i in grid_columns]
+        if grid_columns:
+            column_defs.append({"field": 'file'})
+    logger.debug('update_plot: %d files, %d saved curves, x=%s, y=%s: %s', len(file_use), len(state.data_container),
+                 x, y, timer.summary())
+    return fig, column_defs, len(fig.data)
+
+
+# filtered and sorted table of the current selection per session, reused for all row blocks of the same view.
+# Only the views of the most recently used sessions are kept
+grid_views = OrderedDict()
+grid_views_lock = threading.Lock()
+max_grid_views = 32
+
+
+def get_grid_table(session_id, state, sort_model, filter_model):
+    item = state.current_item_container  # item = [[selected files] , colX, colY]
+    if len(item) == 0:
+        return pd.DataFrame()
+    filenames = [state.file_path(f) for f in item[0]]
+    # the view is valid as long as the files on disk are unchanged, it is checked before any file is parsed so
+    # that selections larger than the parse cache are not parsed again for every row block
+    versions = []
+    for filename in filenames:
+        try:
+            stat = os.stat(filename)
+            versions.append((filename, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            versions.append((filename, None, None))
+    key = (tuple(versions), json.dumps(sort_model), json.dumps(filter_model, sort_keys=True))
+    with grid_views_lock:
+        view = grid_views.get(session_id)
+        if view is not None:
+            grid_views.move_to_end(session_id)
+    if view is not None and view['key'] == key:
+        return view['table']
+    files, errors = data_reader.load_files(filenames)
+    # combined table with a categorical file column
+    table = apply_sort_model(apply_filter_model(files.to_table(), filter_model), sort_model)
+    with grid_views_lock:
+        grid_views[session_id] = {'key': key, 'table': table}
+        grid_views.move_to_end(session_id)
+        while len(grid_views) > max_grid_views:
+            grid_views.popitem(last=False)
+    return table
+
+
+@callback(
+    Output("grid", "getRowsResponse"),
+    Input("grid", "getRowsRequest"),
+    State('session_id', 'data'),
+    prevent_initial_call=True
+)
+@timed('update_grid_rows')
+def update_grid_rows(request, session_id):
+    if not request:
+        return no_update
+    # read only, the state is not saved back
+    state = sessions.load(session_id)
+    table = get_grid_table(session_id, state, request.get('sortModel'), request.get('filterModel'))
+    return get_rows_response(table, request)
+
+
+# reload the visible row blocks after the selection changed, nothing to do while the table tab is closed
+clientside_callback(
+    """
+    function (columnDefs) {
+        const gridApi = dash_ag_grid.getApi("grid");
+        if (gridApi) {
+            gridApi.purgeInfiniteCache();
+        }
+    }
+    """,
+    Input("grid", "columnDefs"),
+    prevent_initial_call=True
+)
+
+
+@callback(
+    Output('line-chart', 'extendData'),
+    Input('interval_live', 'n_intervals'),
+    State('session_id', 'data'),
+    prevent_initial_call=True
+)
+@timed('follow_files')
+@sessions.with_state()
+def follow_files(n_intervals, state):
+    # live mode: append the rows written to the selected files since the last update to their traces
+    item = state.current_item_container  # item = [[selected files] , colX, colY]
+    if len(item) == 0 or len(state.follow) == 0:
+        return no_update
+    x_new, y_new, trace_indices = [], [], []
+    for file, position in state.follow.items():
+        if position.get('restarted'):
+            # the file was rewritten: it is not followed any more until update_plot replaced its trace and the
+            # positions
+            continue
+        try:
+            if 'offset' not in position:
+                # plotted with live mode off: continue after the plotted rows
+                position = dict(data_reader.position_after_rows(file, position['rows']), trace=position['trace'])
+            xy, new_position = data_reader.read_appended(file, position, columns=[item[1], item[2]])
+        except (OSError, ValueError) as e:
+            logger.warning('could not follow file: %s: %s', file, e)
+            continue
+        state.follow[file] = dict(new_position, trace=position['trace'])
+        if state.follow[file]['restarted']:
+            logger.info('file was rewritten, live update stopped until it is plotted again: %s', file)
+            continue
+        if len(xy) == 0 or item[1] not in xy.columns or item[2] not in xy.columns:
+            continue
+        x_plot, y_plot = downsample_trace(xy[item[1]].to_numpy(), xy[item[2]].to_numpy(), points_per_trace)
+        x_new.append(x_plot.tolist())
+        y_new.append(y_plot.tolist())
+        trace_indices.append(position['trace'])
+    if len(trace_indices) == 0:
+        return no_update
+    return [dict(x=x_new, y=y_new), trace_indices]
+
+
+# switch live mode on / off in the browser
+clientside_callback(
+    """
+    function (live) {
+        return !live;
+    }
+    """,
+    Output('interval_live', 'disabled'),
+    Input('switch_live', 'value'),
+)
+
+
+@callback(
+    Output("line-chart", "figure", allow_duplicate=True),
+    Input('input_x_label', 'value'),
+    Input('input_y_label', 'value'),
+    Input('input_plot_label', 'value'),
+    Input('radio_items_plot_style', 'value'),
+    Input('switch_x_log', 'value'),
+    Input('switch_y_log', 'value'),
+    Input('switch_x_rev', 'value'),
+    Input('switch_y_rev', 'value'),
+    Input('switch_legend', 'value'),
+    State('trace_count', 'data'),
+    prevent_initial_call=True
+)
+@timed('update_plot_style')
+def update_plot_style(input_x_label, input_y_label, input_plot_label, radio_items_plot_style, switch_x_log,
+                      switch_y_log, switch_x_rev, switch_y_rev, switch_legend, trace_count):
+    # style only changes: send a Patch of the affected layout / trace keys instead of a new figure
+    triggered_id = ctx.triggered_id
+    patched_figure = Patch()
+    if triggered_id == 'input_x_label':
+        patched_figure['layout']['xaxis']['title']['text'] = input_x_label
+    elif triggered_id == 'input_y_label':
+        patched_figure['layout']['yaxis']['title']['text'] = input_y_label
+    elif triggered_id == 'input_plot_label':
+        patched_figure['layout']['title']['text'] = input_plot_label
+    elif triggered_id == 'radio_items_plot_style':
+        for i in range(trace_count or 0):
+            patched_figure['data'][i]['mode'] = radio_items_plot_style
+    elif triggered_id == 'switch_x_log':
+        patched_figure['layout']['xaxis']['type'] = 'log' if switch_x_log else 'linear'
+    elif triggered_id == 'switch_y_log':
+        patched_figure['layout']['yaxis']['type'] = 'log' if switch_y_log else 'linear'
+    elif triggered_id == 'switch_x_rev':
+        patched_figure['layout']['xaxis']['autorange'] = 'reversed' if switch_x_rev else True
+    elif triggered_id == 'switch_y_rev':
+        patched_figure['layout']['yaxis']['autorange'] = 'reversed' if switch_y_rev else True
+    elif triggered_id == 'switch_legend':
+        patched_figure['layout']['showlegend'] = bool(switch_legend)
+    return patched_figure
+
+
+@app.server.after_request
+def record_response_size(response):
+    # size of every callback response by callback, e.g. figures of update_plot and row blocks of update_grid_rows
+    if request.path.endswith('/_dash-update-component') and response.status_code == 200:
+        body = request.get_json(silent=True) or {}
+        entry = app.callback_map.get(body.get('output'), {})
+        name = getattr(entry.get('callback'), '__name__', body.get('output', ''))
+        response_bytes.observe(response.content_length or len(response.get_data()), callback=name)
+    return response
+
+
+@app.server.route('/metrics')
+def metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
 
 
 if __name__ == "__main__":
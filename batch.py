@@ -0,0 +1,170 @@
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from get_data import GetData
+from curve_store import CurveStore
+from formula import evaluate_formula, FormulaError
+from figure_builder import curve_trace, style_figure
+
+logger = logging.getLogger('batch')
+
+
+# plot without the server: the files matching the globs are parsed in parallel, every x/y column pair of every file
+# becomes a curve (C1, C2, ... in the order of the pairs, then the files, like 'keep data' in the app), formulas are
+# evaluated on these curves and the result is written as CSV, npz and/or a standalone HTML figure.
+#
+#   python batch.py "sweep/**/*.plt" --pair time "anode TotalCurrent" --y-factor 1e3 \
+#       --formula "C1 - C2" --output-dir plots --name sweep --formats csv,npz,html
+
+
+def expand_globs(patterns):
+    # files matching the glob patterns ('**' matches folders recursively), in pattern order without duplicates
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        files += [f for f in matches if os.path.isfile(f) and f not in files]
+    return files
+
+
+def short_names(files):
+    # file names relative to the common folder of all files, like the short names in the app
+    if len(files) == 0:
+        return []
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in files])
+    return [os.path.relpath(os.path.abspath(f), root) for f in files]
+
+
+class CsvWriter:
+    # combined data in long format (curve, name, x, y), curves are written as soon as they are complete
+    def __init__(self, filename):
+        self._file = open(filename, 'w', newline='')
+        self._file.write('curve,name,x,y\n')
+
+    def write(self, identifier, name, x, y):
+        pd.DataFrame({'curve': identifier, 'name': name, 'x': x, 'y': y}).to_csv(self._file, header=False,
+                                                                              index=False)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def run(files, pairs, formulas=(), x_factor=1.0, y_factor=1.0, curve_factors=None, output_dir='.', name='batch',
+        formats=('csv', 'npz', 'html'), points=4000, style=None, max_workers=None, pool='thread'):
+    # returns the curve_store.CurveStore of all curves (files and formulas), factors set but not applied
+    os.makedirs(output_dir, exist_ok=True)
+    data_reader = GetData(max_workers=max_workers, pool=pool)
+    columns = list(dict.fromkeys(column for pair in pairs for column in pair))
+    names = dict(zip(files, short_names(files)))
+    # identifiers are fixed before parsing so that they do not depend on the completion order
+    identifiers = {(p, file): f'C{p * len(files) + i + 1}' for p in range(len(pairs)) for i, file in enumerate(files)}
+    curve_factors = curve_factors or {}
+    store = CurveStore()
+    parsed = {}
+    csv_writer = CsvWriter(os.path.join(output_dir, f'{name}.csv')) if 'csv' in formats else None
+
+    def add_curve(identifier, curve_name, x, y):
+        curve = store.add(identifier, curve_name, x, y)
+        curve.x_factor, curve.y_factor = curve_factors.get(identifier, (x_factor, y_factor))
+        return curve
+
+    start = time.perf_counter()
+    try:
+        for count, (file, df, error) in enumerate(data_reader.iter_parse_files(files, columns=columns), start=1):
+            if error is not None or df is None:
+                logger.warning('[%d/%d] could not read %s: %s', count, len(files), file, error or 'unknown file type')
+                continue
+            for p, (x, y) in enumerate(pairs):
+                if x not in df.columns or y not in df.columns:
+                    logger.warning('[%d/%d] %s: no columns %s / %s', count, len(files), file, x, y)
+                    continue
+                identifier = identifiers[(p, file)]
+                parsed[identifier] = (f'{names[file]}_{y}', df[x].to_numpy(), df[y].to_numpy())
+                if csv_writer is not None:
+                    x_scale, y_scale = curve_factors.get(identifier, (x_factor, y_factor))
+                    csv_writer.write(identifier, parsed[identifier][0], parsed[identifier][1] * x_scale,
+                                     parsed[identifier][2] * y_scale)
+            logger.info('[%d/%d] %s: %d rows', count, len(files), file, len(df))
+        for identifier in sorted(parsed, key=lambda i: int(i[1:])):
+            add_curve(identifier, *parsed[identifier])
+        counter = len(identifiers) + 1
+        for formula in formulas:
+            try:
+                x_result, y_result = evaluate_formula(formula, store)
+            except FormulaError as e:
+                logger.warning('formula %s: %s', formula, e)
+                continue
+            curve = add_curve(f'C{counter}', f'C{counter}_calculation', x_result, y_result)
+            curve.label = formula
+            if csv_writer is not None:
+                csv_writer.write(curve.identifier, curve.name, *curve.scaled())
+            logger.info('C%d = %s', counter, formula)
+            counter += 1
+    finally:
+        if csv_writer is not None:
+            csv_writer.close()
+
+    if 'npz' in formats:
+        arrays = {}
+        for curve in store:
+            arrays[f'{curve.identifier}_x'], arrays[f'{curve.identifier}_y'] = curve.scaled()
+        np.savez(os.path.join(output_dir, f'{name}.npz'), names=np.array([c.name for c in store]), **arrays)
+    if 'html' in formats:
+        fig = go.Figure()
+        for i, curve in enumerate(store):
+            fig.add_trace(curve_trace(*curve.scaled(), curve.label or curve.name, i, points=points))
+        style_figure(fig, **(style or {}))
+        fig.write_html(os.path.join(output_dir, f'{name}.html'), include_plotlyjs=True)
+    logger.info('%d curves from %d files written to %s in %.1f s', len(store), len(files), output_dir,
+                time.perf_counter() - start)
+    return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Plot and export x/y column pairs of many .plt/.csv files '
+                                                 'without starting the server')
+    parser.add_argument('files', nargs='+', help='files or glob patterns (quote them, ** matches folders)')
+    parser.add_argument('--pair', nargs=2, action='append', metavar=('X', 'Y'), required=True,
+                        help='x and y column, can be given several times')
+    parser.add_argument('--x-factor', type=float, default=1.0, help='factor for the x values of all curves')
+    parser.add_argument('--y-factor', type=float, default=1.0, help='factor for the y values of all curves')
+    parser.add_argument('--curve-factors', nargs=3, action='append', metavar=('CURVE', 'X_FACTOR', 'Y_FACTOR'),
+                        default=[], help='factors of a single curve, e.g. C3 1 1e3')
+    parser.add_argument('--formula', action='append', default=[],
+                        help='new curve calculated from the curves, e.g. "C1 - C2", can be given several times')
+    parser.add_argument('--output-dir', default='.', help='folder for the output files')
+    parser.add_argument('--name', default='batch', help='name of the output files (<name>.csv/.npz/.html)')
+    parser.add_argument('--formats', default='csv,npz,html', help='comma separated: csv, npz, html')
+    parser.add_argument('--points', type=int, default=4000, help='maximum points per trace in the HTML figure '
+                                                                 '(0: all points)')
+    parser.add_argument('--title', help='figure title')
+    parser.add_argument('--x-label', help='x axis label')
+    parser.add_argument('--y-label', help='y axis label')
+    parser.add_argument('--x-log', action='store_true', help='logarithmic x axis')
+    parser.add_argument('--y-log', action='store_true', help='logarithmic y axis')
+    parser.add_argument('--workers', type=int, help='number of parallel workers (default: number of cores)')
+    parser.add_argument('--pool', choices=['thread', 'process'], default='thread', help='worker pool')
+    parser.add_argument('--quiet', action='store_true', help='only print warnings')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO, format='%(message)s',
+                        stream=sys.stderr)
+    files = expand_globs(args.files)
+    if len(files) == 0:
+        parser.error('no files found')
+    curve_factors = {identifier: (float(x), float(y)) for identifier, x, y in args.curve_factors}
+    style = {'x_label': args.x_label, 'y_label': args.y_label, 'title': args.title, 'x_log': args.x_log,
+             'y_log': args.y_log}
+    run(files, [tuple(pair) for pair in args.pair], args.formula, args.x_factor, args.y_factor, curve_factors,
+        args.output_dir, args.name, [f.strip() for f in args.formats.split(',')], args.points, style, args.workers,
+        args.pool)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+# Benchmarks for parsing and the plot callbacks, run with: python -m benchmarks.run --help
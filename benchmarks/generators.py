@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+
+def plt_dataset_names(n_datasets):
+    # first dataset is the simulation time like in TCAD output, the others are contact quantities
+    quantities = ['OuterVoltage', 'InnerVoltage', 'TotalCurrent', 'eCurrent', 'hCurrent', 'Charge']
+    names = ['time']
+    for i in range(n_datasets - 1):
+        names.append(f'contact{i // len(quantities)} {quantities[i % len(quantities)]}')
+    return names
+
+
+def write_plt(filename, n_rows, n_datasets, seed=0):
+    # synthetic .plt file with the datasets [...] / Data {...} layout read by GetData
+    rng = np.random.default_rng(seed)
+    names = plt_dataset_names(n_datasets)
+    data = rng.standard_normal((n_rows, n_datasets)) * 1e-3
+    data[:, 0] = np.linspace(0, 1e-6, n_rows)
+    with open(filename, 'w') as f:
+        f.write('DF-ISE text\n\nInfo {\n  version   = 1.0\n  type      = xyplot\n  datasets  = [\n')
+        for i in range(0, n_datasets, 4):
+            f.write('    ' + ' '.join(f'"{name}"' for name in names[i:i + 4]) + '\n')
+        f.write('  ]\n  functions = [\n    ' + ' '.join(['Time'] * n_datasets) + ' ]\n}\n\nData {\n')
+        np.savetxt(f, data, fmt='%.15e', delimiter=' ')
+        f.write('}\n')
+    return names
+
+
+def write_csv(filename, n_rows, n_columns, seed=0):
+    # synthetic .csv file with an arc_length column (scaled by GetData) and n_columns - 1 value columns
+    rng = np.random.default_rng(seed)
+    data = {'arc_length': np.linspace(0, 1e-4, n_rows)}
+    for i in range(n_columns - 1):
+        data[f'value{i}'] = rng.standard_normal(n_rows)
+    pd.DataFrame(data).to_csv(filename, index=False)
+    return list(data)
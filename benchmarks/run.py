@@ -0,0 +1,145 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextvars import copy_context
+
+import numpy as np
+import pandas as pd
+from dash._callback_context import context_value
+from dash._utils import AttributeDict, to_json
+
+from benchmarks.generators import write_plt, write_csv
+
+
+def call_callback(func, triggered_prop, *args):
+    # run a dash callback outside of a request, triggered_prop: 'component_id.property' of the trigger
+    def run():
+        context_value.set(AttributeDict(triggered_inputs=[{'prop_id': triggered_prop, 'value': None}]))
+        return func(*args)
+    return copy_context().run(run)
+
+
+def measure(func, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return {'min_s': min(times), 'median_s': statistics.median(times), 'repeat': repeat}, result
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except OSError:
+        return ''
+
+
+def run_benchmarks(data_dir, n_files, n_rows, n_datasets, repeat):
+    from get_data import GetData
+    import app
+
+    plt_files = [os.path.join(data_dir, f'sweep_{i}.plt') for i in range(n_files)]
+    for i, filename in enumerate(plt_files):
+        names = write_plt(filename, n_rows, n_datasets, seed=i)
+    csv_file = os.path.join(data_dir, 'cut.csv')
+    write_csv(csv_file, n_rows, n_datasets, seed=0)
+    x, y = names[0], names[2]
+    results = {}
+
+    def add(name, timing, **extra):
+        timing.update(extra)
+        results[name] = timing
+        print(f'{name:32s} {timing["median_s"] * 1e3:10.2f} ms', {k: v for k, v in extra.items()}, file=sys.stderr)
+
+    # parsing
+    for engine in ['numpy', 'python']:
+        timing, df = measure(lambda: GetData(plt_engine=engine).parse_file(plt_files[0]), repeat)
+        add(f'parse_plt_{engine}', timing, rows=len(df), columns=len(df.columns),
+            file_bytes=os.path.getsize(plt_files[0]))
+    timing, df = measure(lambda: GetData().parse_file(plt_files[0], columns=[x, y]), repeat)
+    add('parse_plt_projected', timing, columns=len(df.columns))
+    timing, df = measure(lambda: GetData().parse_file(csv_file), repeat)
+    add('parse_csv', timing, rows=len(df), file_bytes=os.path.getsize(csv_file))
+    reader = GetData()
+    reader.parse_file(plt_files[0])
+    timing, df = measure(lambda: reader.parse_file(plt_files[0]), repeat)
+    add('parse_plt_cached', timing)
+    timing, _ = measure(lambda: GetData().parse_files(plt_files, columns=[x, y]), repeat)
+    add('parse_files_parallel', timing, files=n_files)
+
+    # column discovery
+    timing, columns = measure(lambda: [GetData().get_columns(f) for f in plt_files], repeat)
+    add('get_columns', timing, files=n_files, columns=len(columns[0]))
+
+    # callbacks, called directly with a prepared session
+    session_id = 'benchmark'
+    state = app.sessions.load(session_id)
+    state.save_file_to_file_list(plt_files)
+    app.sessions.save(session_id, state)
+    selection = [os.path.basename(f) for f in plt_files]
+    style = [None, None, None, 'lines', False, False, False, False, True]
+
+    def update_plot(trigger='file_use.value', relayout_data=None):
+        return call_callback(app.update_plot, trigger, selection, x, y, [], relayout_data, *style, False,
+                             session_id)
+
+    timing, output = measure(update_plot, repeat)
+    add('update_plot', timing, traces=len(output[0].data), figure_bytes=len(to_json(output[0])),
+        column_defs_bytes=len(to_json(output[1])))
+    x_max = float(app.data_reader.parse_file(plt_files[0])[x].max())
+    timing, output = measure(lambda: update_plot('line-chart.relayoutData', {'xaxis.range[0]': 0,
+                                                                             'xaxis.range[1]': x_max / 10}), repeat)
+    add('update_plot_zoom', timing, figure_bytes=len(to_json(output[0])))
+    timing, output = measure(lambda: call_callback(app.update_plot_style, 'switch_x_log.value', None, None, None,
+                                                   'lines', True, False, False, False, True, n_files), repeat)
+    add('update_plot_style', timing, patch_bytes=len(to_json(output)))
+
+    # data table
+    request = {'startRow': 0, 'endRow': 200, 'sortModel': [], 'filterModel': {}}
+    timing, output = measure(lambda: call_callback(app.update_grid_rows, 'grid.getRowsRequest', request, session_id),
+                             repeat)
+    add('grid_block', timing, block_bytes=len(to_json(output)), row_count=output['rowCount'])
+    sorted_request = dict(request, sortModel=[{'colId': y, 'sort': 'desc'}])
+    app.grid_views.clear()
+    timing, output = measure(lambda: call_callback(app.update_grid_rows, 'grid.getRowsRequest', sorted_request,
+                                                   session_id), 1)
+    add('grid_block_sorted_cold', timing, block_bytes=len(to_json(output)))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark parsing, column discovery, figure construction and '
+                                                 'grid serialisation on synthetic .plt/.csv files')
+    parser.add_argument('--files', type=int, default=4, help='number of .plt files in the selection')
+    parser.add_argument('--rows', type=int, default=100000, help='rows per file')
+    parser.add_argument('--datasets', type=int, default=20, help='datasets (columns) per file')
+    parser.add_argument('--repeat', type=int, default=3, help='repetitions per benchmark')
+    parser.add_argument('--data-dir', help='folder for the generated files (default: temporary folder)')
+    parser.add_argument('--output', help='write the results as JSON to this file (default: stdout)')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = args.data_dir or tmp_dir
+        os.makedirs(data_dir, exist_ok=True)
+        results = run_benchmarks(data_dir, args.files, args.rows, args.datasets, args.repeat)
+
+    report = {'commit': git_commit(), 'python': platform.python_version(), 'numpy': np.__version__,
+              'pandas': pd.__version__, 'parameters': vars(args), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import itertools
+import threading
+from contextvars import ContextVar
+from functools import wraps
+from dash.exceptions import PreventUpdate
+from metrics import registry
+
+superseded_calls = registry.counter('dash_plt_superseded_calls_total',
+                                    'Callback calls stopped because a newer call of the same session arrived',
+                                    ['callback'])
+
+_current_call = ContextVar('current_call', default=None)
+
+
+class Coalescer:
+    # latest wins for a callback of one session: while a call is running, a newer call of the same callback and
+    # session supersedes it and the older call stops at its next checkpoint() instead of rendering an outdated
+    # state (the browser would drop its response anyway). Calls are only coordinated within one server process
+    def __init__(self):
+        self._latest = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def latest_only(self, name):
+        # decorator for callbacks with the session id as last argument (outside of SessionStore.with_state)
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args):
+                key = (name, args[-1])
+                call_id = next(self._counter)
+                with self._lock:
+                    # [id of the latest call, number of running calls]
+                    entry = self._latest.setdefault(key, [call_id, 0])
+                    entry[0] = call_id
+                    entry[1] += 1
+                token = _current_call.set((self, key, call_id))
+                try:
+                    return func(*args)
+                finally:
+                    _current_call.reset(token)
+                    with self._lock:
+                        entry[1] -= 1
+                        if entry[1] == 0:
+                            del self._latest[key]
+            return wrapper
+        return decorator
+
+    def is_current(self, key, call_id):
+        with self._lock:
+            entry = self._latest.get(key)
+            return entry is None or entry[0] == call_id
+
+
+def checkpoint():
+    # stop the running callback if a newer call of the same session superseded it, no-op outside latest_only
+    call = _current_call.get()
+    if call is not None and not call[0].is_current(call[1], call[2]):
+        superseded_calls.inc(callback=call[1][0])
+        raise PreventUpdate
@@ -0,0 +1,143 @@
+import numpy as np
+import threading
+import weakref
+from downsample import minmax_downsample
+
+
+def _for_min(values):
+    return np.where(np.isnan(values), np.inf, values)
+
+
+def _for_max(values):
+    return np.where(np.isnan(values), -np.inf, values)
+
+
+class CurveIndex:
+    # min/max pyramid of a curve for viewport queries. Level k holds for every bucket of bucket * factor ** k
+    # consecutive points the positions of the minimum and maximum of y. For ascending x the visible positions are
+    # found by binary search and a viewport is answered from the coarsest level that still gives about n_out points,
+    # i.e. in O(log n + n_out) independent of the curve length. Curves with unsorted x (e.g. sweeps back and forth)
+    # use a sorted-x index to find the visible points, which are then reduced in their original order.
+    # Only positions are kept, the curve arrays are passed to query
+    def __init__(self, x, y, bucket=4, factor=4):
+        x = np.asarray(x)
+        y = np.asarray(y)
+        n = len(y)
+        self.length = n
+        self.ascending = bool(np.all(x[1:] >= x[:-1])) if n > 1 else True
+        # permutation sorting x and the sorted x, only needed for unsorted x
+        self.order = None if self.ascending else np.argsort(x, kind='stable')
+        self.x_sorted = None if self.ascending else x[self.order]
+        self.sizes = []
+        self.mins = []
+        self.maxs = []
+        if n <= bucket:
+            return
+        y_min = _for_min(y)
+        y_max = _for_max(y)
+        mins = maxs = np.arange(n, dtype=np.int32 if n < 2 ** 31 else np.int64)
+        size = bucket
+        while len(mins) > 1:
+            step = bucket if size == bucket else factor
+            mins = self._reduce(mins, y_min, step, np.argmin)
+            maxs = self._reduce(maxs, y_max, step, np.argmax)
+            self.sizes.append(size)
+            self.mins.append(mins)
+            self.maxs.append(maxs)
+            size *= factor
+
+    @staticmethod
+    def _reduce(positions, values, step, arg):
+        # positions of the extreme value in groups of step positions, the last group is padded with its last position
+        pad = -len(positions) % step
+        if pad:
+            positions = np.concatenate([positions, np.full(pad, positions[-1], dtype=positions.dtype)])
+        groups = positions.reshape(-1, step)
+        return groups[np.arange(len(groups)), arg(values[groups], axis=1)]
+
+    def nbytes(self):
+        return sum(a.nbytes for a in self.mins + self.maxs) + (
+            0 if self.order is None else self.order.nbytes + self.x_sorted.nbytes)
+
+    def _extrema(self, y, i0, i1, level):
+        # positions of minimum and maximum of y in [i0, i1), using the levels below level
+        if i1 <= i0:
+            return []
+        for k in range(level - 1, -1, -1):
+            size = self.sizes[k]
+            j0 = -(-i0 // size)
+            j1 = i1 // size
+            if j0 < j1:
+                candidates = [self.mins[k][j0:j1], self.maxs[k][j0:j1]]
+                candidates += self._extrema(y, i0, j0 * size, k) + self._extrema(y, j1 * size, i1, k)
+                candidates = np.concatenate([np.atleast_1d(c) for c in candidates])
+                return [candidates[np.argmin(_for_min(y[candidates]))],
+                        candidates[np.argmax(_for_max(y[candidates]))]]
+        return [i0 + np.argmin(_for_min(y[i0:i1])), i0 + np.argmax(_for_max(y[i0:i1]))]
+
+    def query(self, x, y, x_range=None, n_out=4000):
+        # sorted positions of the points to draw for the x_range (None: whole curve) with about n_out points
+        # (n_out < 4: all visible points). The neighbours of the visible points are included so that lines leave
+        # the visible area correctly
+        n = self.length
+        if not self.ascending:
+            return self._query_unsorted(x, y, x_range, n_out)
+        # visible positions [v0, v1) and their neighbours i0, i1 - 1
+        if x_range is None:
+            v0, v1 = 0, n
+        else:
+            v0 = int(np.searchsorted(x, min(x_range), 'left'))
+            v1 = int(np.searchsorted(x, max(x_range), 'right'))
+        i0 = max(0, v0 - 1)
+        i1 = min(n, v1 + 1)
+        if i1 - i0 <= n_out or n_out < 4:
+            return np.arange(i0, i1)
+        # coarsest level with at most n_out / 2 buckets in the viewport
+        level = 0
+        while level < len(self.sizes) - 1 and (v1 - v0) / self.sizes[level] > n_out // 2:
+            level += 1
+        size = self.sizes[level]
+        j0 = -(-v0 // size)
+        j1 = v1 // size
+        parts = [self.mins[level][j0:j1], self.maxs[level][j0:j1], [i0, i1 - 1]]
+        # buckets cut by the viewport edges, the neighbours are not part of them so that they cannot hide the
+        # extremes of the visible points next to the edges
+        parts += [self._extrema(y, v0, min(v1, j0 * size), level), self._extrema(y, max(v0, j1 * size), v1, level)]
+        return np.unique(np.concatenate([np.asarray(p, dtype=np.int64) for p in parts if len(p)]))
+
+    def _query_unsorted(self, x, y, x_range, n_out):
+        if x_range is None:
+            positions = np.arange(self.length)
+        else:
+            k0 = int(np.searchsorted(self.x_sorted, min(x_range), 'left'))
+            k1 = int(np.searchsorted(self.x_sorted, max(x_range), 'right'))
+            inside = np.sort(self.order[k0:k1])
+            # neighbours of the visible points in drawing order
+            positions = np.unique(np.concatenate([inside - 1, inside, inside + 1]))
+            positions = positions[(positions >= 0) & (positions < self.length)]
+        if len(positions) <= n_out or n_out < 4:
+            return positions
+        return minmax_downsample(positions, y[positions], n_out)[0]
+
+
+# indexes by curve arrays, curve arrays are read-only so an index stays valid as long as its arrays exist
+_indexes = {}
+_lock = threading.Lock()
+
+
+def curve_index(x, y):
+    # CurveIndex of the arrays x and y, built on the first request
+    key = (id(x), id(y))
+    with _lock:
+        entry = _indexes.get(key)
+        if entry is not None and entry[0]() is x and entry[1]() is y:
+            return entry[2]
+    index = CurveIndex(x, y)
+
+    def forget(_, key=key):
+        with _lock:
+            _indexes.pop(key, None)
+
+    with _lock:
+        _indexes[key] = (weakref.ref(x, forget), weakref.ref(y, forget), index)
+    return index
@@ -0,0 +1,106 @@
+import numpy as np
+import mmap
+from curve_index import curve_index
+
+
+def _is_mapped(base):
+    return isinstance(base, memoryview) and isinstance(base.obj, mmap.mmap)
+
+
+class Curve:
+    # one saved curve: contiguous float64 arrays plus display metadata
+    def __init__(self, identifier, name, x, y, label=None, x_factor=1.0, y_factor=1.0):
+        self.identifier = identifier
+        self.name = name
+        self.x = self._as_array(x)
+        self.y = self._as_array(y)
+        self.label = name if label is None else label
+        self.x_factor = x_factor
+        self.y_factor = y_factor
+
+    @staticmethod
+    def _as_array(values):
+        # arrays of other curves are shared (e.g. x of calculated curves) as well as read-only views of a memory
+        # mapped workspace file, everything else is copied so that no reference to cached file data is kept
+        if isinstance(values, np.ndarray) and values.dtype == np.float64 and not values.flags.writeable \
+                and values.flags.c_contiguous and (values.base is None or _is_mapped(values.base)):
+            return values
+        array = np.array(values, dtype='float64')
+        array.flags.writeable = False
+        return array
+
+    def scaled(self):
+        # x and y with the curve factors applied, unscaled arrays are returned without a copy
+        x = self.x if self.x_factor == 1 else self.x * self.x_factor
+        y = self.y if self.y_factor == 1 else self.y * self.y_factor
+        return x, y
+
+    def index(self):
+        # min/max pyramid of the curve, built on the first call and shared by all curves with the same arrays
+        return curve_index(self.x, self.y)
+
+    def viewport(self, x_range=None, n_out=4000):
+        # scaled x and y of about n_out points to draw for x_range (scaled x units, None: whole curve), taken from
+        # the index so that the time does not depend on the curve length. Factors do not change which points are
+        # the extremes, so the index of the unscaled curve is used
+        if x_range is not None and self.x_factor != 0:
+            x_range = [value / self.x_factor for value in x_range]
+        elif self.x_factor == 0:
+            x_range = None
+        positions = self.index().query(self.x, self.y, x_range, n_out)
+        return self.x[positions] * self.x_factor, self.y[positions] * self.y_factor
+
+
+class CurveStore:
+    # saved curves in insertion order, looked up by curve identifier (C1, C2, ...) or curve name
+    def __init__(self):
+        self._curves = {}
+        self._names = {}
+
+    def __len__(self):
+        return len(self._curves)
+
+    def __iter__(self):
+        return iter(list(self._curves.values()))
+
+    def __contains__(self, identifier):
+        return identifier in self._curves
+
+    def add(self, identifier, name, x, y, label=None, build_index=False):
+        # build_index: build the viewport index now instead of on the first Curve.viewport
+        if identifier in self._curves:
+            self.remove(identifier)
+        curve = Curve(identifier, name, x, y, label)
+        if build_index:
+            curve.index()
+        self._curves[identifier] = curve
+        self._names[name] = identifier
+        return curve
+
+    def get(self, identifier):
+        return self._curves[identifier]
+
+    def get_by_name(self, name):
+        identifier = self._names.get(name)
+        return None if identifier is None else self._curves[identifier]
+
+    def remove(self, identifier):
+        curve = self._curves.pop(identifier)
+        if self._names.get(curve.name) == identifier:
+            del self._names[curve.name]
+        return curve
+
+    def clear(self):
+        self._curves.clear()
+        self._names.clear()
+
+    def identifiers(self):
+        return list(self._curves)
+
+    def names(self):
+        return [curve.name for curve in self._curves.values()]
+
+    def nbytes(self):
+        # shared arrays are only counted once
+        arrays = {id(a): a for curve in self._curves.values() for a in (curve.x, curve.y)}
+        return sum(a.nbytes for a in arrays.values())
@@ -0,0 +1,64 @@
+import numpy as np
+
+
+def minmax_downsample(x, y, n_out):
+    # keep first/last point and min + max of y in n_out / 2 equally sized index buckets,
+    # peaks and edges stay visible while the number of points is bounded by about n_out
+    x = np.asarray(x)
+    y = np.asarray(y)
+    n = len(y)
+    if n <= n_out or n_out < 4:
+        return x, y
+    n_buckets = n_out // 2
+    k = -(-n // n_buckets)  # ceil
+    n_full = n // k
+    y_full = y[:n_full * k].reshape(n_full, k)
+    nan = np.isnan(y_full)
+    base = np.arange(n_full) * k
+    idx = [base + np.where(nan, np.inf, y_full).argmin(axis=1),
+           base + np.where(nan, -np.inf, y_full).argmax(axis=1)]
+    if n_full * k < n:
+        rest = y[n_full * k:]
+        if not np.isnan(rest).all():
+            idx += [np.array([n_full * k + np.nanargmin(rest), n_full * k + np.nanargmax(rest)])]
+    idx = np.unique(np.concatenate(idx + [np.array([0, n - 1])]))
+    return x[idx], y[idx]
+
+
+def visible_mask(x, x_range):
+    # points inside x_range plus their direct neighbours so that lines leave the visible area correctly
+    lo, hi = min(x_range), max(x_range)
+    inside = (x >= lo) & (x <= hi)
+    mask = inside.copy()
+    mask[:-1] |= inside[1:]
+    mask[1:] |= inside[:-1]
+    return mask
+
+
+def downsample_trace(x, y, n_out, x_range=None):
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if x_range is not None:
+        mask = visible_mask(x, x_range)
+        x, y = x[mask], y[mask]
+    return minmax_downsample(x, y, n_out)
+
+
+def x_range_from_relayout(relayout_data, x_log=False):
+    # visible x-range in data units from a plotly relayoutData event, None for autorange / no x zoom
+    if not relayout_data:
+        return None
+    if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+        x_range = [relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']]
+    elif 'xaxis.range' in relayout_data:
+        x_range = list(relayout_data['xaxis.range'])
+    else:
+        return None
+    try:
+        x_range = [float(v) for v in x_range]
+    except (TypeError, ValueError):
+        return None
+    if x_log:
+        # log axes report the range as log10 values
+        x_range = [10 ** v for v in x_range]
+    return x_range
@@ -0,0 +1,54 @@
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+from downsample import downsample_trace
+
+
+# traces with more points than this are drawn with WebGL (go.Scattergl) instead of SVG
+webgl_threshold = 20000
+
+
+def make_trace(x, y, **kwargs):
+    # x/y are passed as numpy arrays, plotly (>= 6) sends them to the browser as base64 typed arrays
+    # ({'dtype': 'f8', 'bdata': ...}) instead of JSON number lists
+    x = np.ascontiguousarray(x)
+    y = np.ascontiguousarray(y)
+    trace_type = go.Scattergl if len(x) > webgl_threshold else go.Scatter
+    return trace_type(x=x, y=y, **kwargs)
+
+
+def curve_trace(x, y, name, color_index, mode='lines', points=0, x_range=None):
+    # trace of one curve, re-sampled to about points points (0: all) in x_range, colours cycle through D3
+    x_plot, y_plot = downsample_trace(x, y, points, x_range)
+    return make_trace(x_plot, y_plot, mode=mode, name=name,
+                      line=dict(color=px.colors.qualitative.D3[color_index % len(px.colors.qualitative.D3)]))
+
+
+def style_figure(fig, x_label=None, y_label=None, title=None, x_log=False, y_log=False, x_rev=False, y_rev=False,
+                 legend=True, zoom=None):
+    # axes, title and template of the plot, zoom: {'xaxis': [min, max], ...} keeps a zoomed view
+    fig.update_layout(xaxis=dict(showexponent='all', exponentformat='e'))
+    fig.update_layout(yaxis=dict(showexponent='all', exponentformat='e'))
+    fig.update_layout(
+        template='ggplot2')  # "plotly", "plotly_white", "plotly_dark", "ggplot2", "seaborn", "simple_white"
+
+    if x_rev:
+        fig.update_xaxes(autorange="reversed")
+    if y_rev:
+        fig.update_yaxes(autorange="reversed")
+    if x_label:
+        fig.update_xaxes(title_text=x_label)
+    if y_label:
+        fig.update_yaxes(title_text=y_label)
+    if x_log:
+        fig.update_xaxes(type="log")
+    if y_log:
+        fig.update_yaxes(type="log")
+
+    if not legend:
+        fig.update_layout(showlegend=False)
+
+    fig.update_layout(title={'text': title, 'y': 0.95, 'x': 0.4}, height=800)
+    for axis, axis_range in (zoom or {}).items():
+        fig.update_layout({axis: dict(range=axis_range, autorange=False)})
+    return fig
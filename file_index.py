@@ -0,0 +1,113 @@
+import os
+import re
+import time
+import threading
+
+
+def glob_regex(pattern):
+    # regular expression for a glob pattern on '/' separated relative paths: * and ? do not match '/',
+    # '**/' matches any number of folders (also none), [...] character classes as in fnmatch
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i):
+            parts.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            parts.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            parts.append('[^/]')
+            i += 1
+        elif pattern[i] == '[' and ']' in pattern[i + 2:]:
+            end = pattern.index(']', i + 2)
+            chars = pattern[i + 1:end]
+            if chars.startswith('!'):
+                chars = '^' + chars[1:]
+            parts.append('[' + chars.replace('\\', '\\\\') + ']')
+            i = end + 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile(''.join(parts) + r'\Z')
+
+
+class FileIndex:
+    # directory listings read with os.scandir and cached per folder: (mtime_ns, checked, {file: (size, mtime_ns)},
+    # [sub folders]). A folder is only listed again if its mtime changed (files added, removed or renamed), and
+    # within check_interval seconds not even its mtime is checked, so repeated searches in a large project tree are
+    # answered from memory. File sizes and times are those of the last listing of their folder.
+    def __init__(self, check_interval=2.0):
+        self.check_interval = check_interval
+        self.scans = 0
+        self._folders = {}
+        self._lock = threading.Lock()
+
+    def listing(self, folder):
+        # cached listing of folder, None if it cannot be read
+        now = time.monotonic()
+        with self._lock:
+            entry = self._folders.get(folder)
+        if entry is not None and now - entry[1] < self.check_interval:
+            return entry
+        try:
+            mtime_ns = os.stat(folder).st_mtime_ns
+        except OSError:
+            self.forget(folder)
+            return None
+        if entry is not None and entry[0] == mtime_ns:
+            entry = (mtime_ns, now, entry[2], entry[3])
+        else:
+            files = {}
+            folders = []
+            try:
+                with os.scandir(folder) as items:
+                    for item in items:
+                        try:
+                            if item.is_dir(follow_symlinks=False):
+                                folders.append(item.name)
+                            elif item.is_file():
+                                stat = item.stat()
+                                files[item.name] = (stat.st_size, stat.st_mtime_ns)
+                        except OSError:
+                            continue
+            except OSError:
+                self.forget(folder)
+                return None
+            entry = (mtime_ns, now, dict(sorted(files.items())), sorted(folders))
+            self.scans += 1
+        with self._lock:
+            self._folders[folder] = entry
+        return entry
+
+    def forget(self, folder):
+        # drop the cached listings of folder and everything below it
+        with self._lock:
+            for path in [p for p in self._folders if p == folder or p.startswith(folder.rstrip(os.sep) + os.sep)]:
+                del self._folders[path]
+
+    def glob(self, root, pattern='**/*', limit=None):
+        # files below root matching pattern (e.g. '*.plt', 'run_*/**/*.csv'), as (relative path, size, mtime_ns)
+        # sorted by folder and name, at most limit matches. Hidden folders are skipped
+        regex = glob_regex(pattern)
+        max_depth = None if '**' in pattern else pattern.count('/')
+        matches = []
+        stack = [('', 0)]
+        while stack:
+            relative, depth = stack.pop()
+            entry = self.listing(os.path.join(root, relative) if relative else root)
+            if entry is None:
+                continue
+            for name, (size, mtime_ns) in entry[2].items():
+                path = relative + name
+                if regex.match(path):
+                    matches.append((path, size, mtime_ns))
+                    if limit is not None and len(matches) >= limit:
+                        return matches
+            if max_depth is None or depth < max_depth:
+                stack += [(relative + name + '/', depth + 1) for name in reversed(entry[3])
+                          if not name.startswith('.')]
+        return matches
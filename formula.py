@@ -0,0 +1,111 @@
+import ast
+import re
+from functools import lru_cache
+import numpy as np
+
+
+class FormulaError(ValueError):
+    pass
+
+
+CURVE_IDENTIFIER = re.compile(r'C\d+$')
+
+# numpy functions allowed in formulas, gradient is added per evaluation as it depends on the x grid
+FUNCTIONS = {
+    'log': np.log, 'log10': np.log10, 'log2': np.log2, 'exp': np.exp, 'abs': np.abs, 'sqrt': np.sqrt,
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan, 'arcsin': np.arcsin, 'arccos': np.arccos, 'arctan': np.arctan,
+    'sinh': np.sinh, 'cosh': np.cosh, 'tanh': np.tanh, 'sign': np.sign, 'minimum': np.minimum,
+    'maximum': np.maximum, 'cumsum': np.cumsum,
+}
+CONSTANTS = {'pi': np.pi, 'e': np.e}
+
+# longer formulas are rejected before parsing
+MAX_LENGTH = 10000
+
+_BINARY_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.FloorDiv)
+_UNARY_OPERATORS = (ast.UAdd, ast.USub)
+
+
+class CompiledFormula:
+    # formula parsed and checked once, evaluated on whole curves as numpy arrays
+    def __init__(self, formula):
+        self.formula = formula
+        if len(formula) > MAX_LENGTH:
+            raise FormulaError(f'formula too long: more than {MAX_LENGTH} characters')
+        self.identifiers = []
+        try:
+            tree = ast.parse(formula.strip(), mode='eval')
+            self._check(tree.body)
+            self._code = compile(tree, '<formula>', 'eval')
+        except SyntaxError as e:
+            raise FormulaError(f'invalid formula: {e.msg}') from None
+        except (RecursionError, MemoryError):
+            # nesting too deep for the parser, the check or the compiler
+            raise FormulaError('formula too complex') from None
+        if len(self.identifiers) == 0:
+            raise FormulaError('no curve identifier (C1, C2, ...) found in formula')
+
+    def _check(self, node):
+        if isinstance(node, ast.BinOp) and isinstance(node.op, _BINARY_OPERATORS):
+            self._check(node.left)
+            self._check(node.right)
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, _UNARY_OPERATORS):
+            self._check(node.operand)
+        elif isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            # float constants, Python int arithmetic like 9 ** 9 ** 9 would not be bounded
+            node.value = float(node.value)
+        elif isinstance(node, ast.Name):
+            if CURVE_IDENTIFIER.match(node.id):
+                if node.id not in self.identifiers:
+                    self.identifiers.append(node.id)
+            elif node.id not in CONSTANTS:
+                raise FormulaError(f'unknown name: {node.id}')
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            if node.func.id not in FUNCTIONS and node.func.id != 'gradient':
+                raise FormulaError(f'function not allowed: {node.func.id}')
+            for arg in node.args:
+                self._check(arg)
+        else:
+            raise FormulaError(f'expression not allowed: {ast.unparse(node)}')
+
+    def evaluate(self, curves):
+        # curves: {identifier: (x, y)}, the x grid of the first curve in the formula is used for the result,
+        # curves on other x grids are interpolated onto it
+        missing = [i for i in self.identifiers if i not in curves]
+        if missing:
+            raise FormulaError(f'curve not found: {", ".join(missing)}')
+        x = np.asarray(curves[self.identifiers[0]][0], dtype='float64')
+        namespace = {'__builtins__': {}}
+        namespace.update(CONSTANTS)
+        namespace.update(FUNCTIONS)
+        namespace['gradient'] = lambda y, x_grad=None: np.gradient(y, x if x_grad is None else x_grad)
+        for identifier in self.identifiers:
+            namespace[identifier] = on_grid(x, *curves[identifier])
+        with np.errstate(all='ignore'):
+            try:
+                y = eval(self._code, namespace)
+            except (TypeError, ValueError, ZeroDivisionError, OverflowError, RecursionError, MemoryError) as e:
+                raise FormulaError(f'error during calculation: {e}') from None
+        return x, np.broadcast_to(np.asarray(y, dtype='float64'), x.shape)
+
+
+def on_grid(x, x_curve, y_curve):
+    # y of a curve on the grid x, interpolated linearly if the curve has a different x grid
+    x_curve = np.asarray(x_curve, dtype='float64')
+    y_curve = np.asarray(y_curve, dtype='float64')
+    if x_curve is x or (len(x_curve) == len(x) and np.array_equal(x_curve, x)):
+        return y_curve
+    order = np.argsort(x_curve, kind='stable')
+    return np.interp(x, x_curve[order], y_curve[order], left=np.nan, right=np.nan)
+
+
+@lru_cache(maxsize=128)
+def compile_formula(formula):
+    return CompiledFormula(formula)
+
+
+def evaluate_formula(formula, curve_store):
+    # evaluate a formula like 'log(abs(C1 - C2))' on the curves of a curve_store.CurveStore
+    compiled = compile_formula(formula)
+    curves = {i: (curve_store.get(i).x, curve_store.get(i).y) for i in compiled.identifiers if i in curve_store}
+    return compiled.evaluate(curves)
@@ -1,88 +1,528 @@
 import numpy as np
 import pandas as pd
 import os
+import io
+import mmap
+import warnings
+import threading
+import time
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from sidecar_cache import SidecarCache
+from multi_file_frame import MultiFileFrame
+from file_index import FileIndex
+from metrics import registry, BYTE_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+parse_seconds = registry.histogram('dash_plt_parse_seconds', 'Time to parse one file (cache misses only)', ['type'])
+parse_bytes = registry.histogram('dash_plt_parse_bytes', 'Size of the files parsed', ['type'], BYTE_BUCKETS)
+read_bytes_total = registry.counter('dash_plt_read_bytes_total', 'Bytes of data files read by the parsers', ['type'])
+cache_lookups = registry.counter('dash_plt_cache_lookups_total', 'Lookups of parsed files in the caches',
+                                 ['cache', 'result'])
 
 
 class GetData:
-    def __init__(self):
-        self.folder_dir = ''
-        self.file_list = []
-        self.file_list_short = []
+    def __init__(self, cache_max_bytes=512 * 1024 ** 2, plt_engine='numpy', sidecar_dir=None,
+                 sidecar_max_bytes=4 * 1024 ** 3, max_workers=None, pool='thread'):
+        # shared by all sessions, the files and curves of a session are kept in session_state.SessionState
         self.file_type = '.plt'
-        self.data_container = {'x': [], 'y': [], 'file': [], 'curve_identifier': []}
-        self.current_item_container = []
-        self.curve_save_counter = 1
-
-    def save_file_to_file_list(self, filelist):
-        for file in filelist:
-            if file not in self.file_list:
-                self.file_list.append(file)
-                self.file_list_short.append(file.split('/')[-1])
-        return self.file_list, self.file_list_short
-
-    def get_file_list_from_folder(self, folder_dir):
-        file_list = []
+        # cached folder listings for get_file_list_from_folder and the file browser
+        self.file_index = FileIndex()
+        # .plt parser: 'numpy' (memory mapped, vectorized) or 'python' (line based)
+        self.plt_engine = plt_engine
+        # parsed DataFrames, key: filename, value: (mtime_ns, size, nbytes, DataFrame), oldest first
+        self.cache_max_bytes = cache_max_bytes
+        self.cache_bytes = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._parse_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # optional on-disk binary cache of parsed files, shared between sessions and restarts
+        self.sidecar = SidecarCache(sidecar_dir, sidecar_max_bytes) if sidecar_dir else None
+        # column names per file, key: filename, value: (mtime_ns, size, columns)
+        self.schema_index = {}
+        # worker pool of parse_files: 'thread' or 'process', max_workers None uses the number of cores
+        self.max_workers = max_workers
+        self.pool = pool
+        self._executor = None
+
+    def get_file_list_from_folder(self, folder_dir, pattern=None, limit=None):
+        # paths relative to folder_dir of the files matching pattern, e.g. '**/*.plt' for all .plt files of the
+        # tree below folder_dir (default: files of self.file_type directly in folder_dir). Folder listings are
+        # cached by the file index and only read again when a folder changed
+        if pattern is None:
+            pattern = f'*{self.file_type}*'
+        return [path for path, size, mtime_ns in self.file_index.glob(folder_dir, pattern, limit)]
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._parse_cache.clear()
+            self.cache_bytes = 0
+
+    def cache_info(self):
+        with self._cache_lock:
+            return {'hits': self.cache_hits, 'misses': self.cache_misses, 'entries': len(self._parse_cache),
+                    'bytes': self.cache_bytes, 'max_bytes': self.cache_max_bytes}
+
+    def _drop_cache_entry(self, filename):
+        entry = self._parse_cache.pop(filename, None)
+        if entry is not None:
+            self.cache_bytes -= entry[2]
+
+    def _cache_lookup(self, filename, columns=None, dtype=None):
+        # stat of the file and the cached DataFrame as long as the file on disk is unchanged (same mtime and size)
+        # and the cached entry holds the requested columns in the requested dtype.
+        # On a miss the columns to parse are returned as well: cached and requested columns together
         try:
-            for item in os.listdir(folder_dir):
-                if os.path.isfile(os.path.join(folder_dir, item)):
-                    if self.file_type in item:
-                        file_list.append(item)
-        except FileNotFoundError:
+            stat = os.stat(filename)
+        except OSError:
+            with self._cache_lock:
+                self._drop_cache_entry(filename)
+            raise
+        parse_columns = None if columns is None else list(columns)
+        with self._cache_lock:
+            entry = self._parse_cache.get(filename)
+            if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                covered, entry_dtype = entry[4], entry[5]
+                if entry_dtype == dtype and (covered is None or columns is not None and covered.issuperset(columns)):
+                    self._parse_cache.move_to_end(filename)
+                    self.cache_hits += 1
+                    cache_lookups.inc(cache='memory', result='hit')
+                    return stat, self._project(entry[3], columns), None
+                if entry_dtype == dtype and covered is not None and columns is not None:
+                    parse_columns = sorted(covered.union(columns))
+            self.cache_misses += 1
+            cache_lookups.inc(cache='memory', result='miss')
+            self._drop_cache_entry(filename)
+        return stat, None, parse_columns
+
+    def _cache_store(self, filename, stat, df, columns=None, dtype=None):
+        # columns: the requested columns the DataFrame was parsed for, None for all columns
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        if nbytes > self.cache_max_bytes:
+            return
+        covered = None if columns is None else frozenset(columns)
+        with self._cache_lock:
+            self._drop_cache_entry(filename)
+            self._parse_cache[filename] = (stat.st_mtime_ns, stat.st_size, nbytes, df, covered, dtype)
+            self.cache_bytes += nbytes
+            # evict least recently used files until the memory budget is met
+            while self.cache_bytes > self.cache_max_bytes:
+                self._drop_cache_entry(next(iter(self._parse_cache)))
+
+    @staticmethod
+    def _project(df, columns):
+        if columns is None:
+            return df
+        return df[[c for c in df.columns if c in columns]]
+
+    def _load_sidecar(self, filename, stat, columns=None, dtype=None):
+        if self.sidecar is None:
+            return None
+        df = self.sidecar.load(filename, stat, columns)
+        cache_lookups.inc(cache='sidecar', result='miss' if df is None else 'hit')
+        if df is not None:
+            if dtype is not None:
+                df = df.astype(dtype)
+            self._cache_store(filename, stat, df, columns, dtype)
+        return df
+
+    def _store_parsed(self, filename, stat, df, columns=None, dtype=None):
+        # the sidecar only keeps columns in their parsed dtype
+        if self.sidecar is not None and dtype is None:
+            self.sidecar.store(filename, stat, df, complete=columns is None)
+        self._cache_store(filename, stat, df, columns, dtype)
+
+    def get_columns(self, filename):
+        # column names of a file, read from the header only (.plt: datasets [...] block, .csv: first line)
+        stat = os.stat(filename)
+        entry = self.schema_index.get(filename)
+        if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return list(entry[2])
+
+        columns = None
+        if filename.split('.')[-1] == 'csv':
+            columns = pd.read_csv(filename, nrows=0).columns.to_list()
+        if filename.split('.')[-1] == 'plt':
+            with open(filename) as f:
+                columns = self._parse_plt_datasets(f)
+        if columns is None:
             return []
-        return file_list
+        self.schema_index[filename] = (stat.st_mtime_ns, stat.st_size, columns)
+        return list(columns)
+
+    def parse_file(self, filename, columns=None, dtype=None):
+        # columns: only parse these columns (None: all), dtype: e.g. 'float32' (None: float64 for .plt, as read
+        # for .csv). The returned DataFrame is shared with the cache and must not be modified in place
+        stat, df, parse_columns = self._cache_lookup(filename, columns, dtype)
+        if df is not None:
+            return df
+        df = self._load_sidecar(filename, stat, parse_columns, dtype)
+        if df is None:
+            start = time.perf_counter()
+            df = self._read_file(filename, parse_columns, dtype)
+            self._observe_parse(filename, stat, df, time.perf_counter() - start)
+            if df is None:
+                return df
+            self._store_parsed(filename, stat, df, parse_columns, dtype)
+        return self._project(df, columns)
+
+    @staticmethod
+    def _observe_parse(filename, stat, df, seconds):
+        file_type = filename.split('.')[-1]
+        parse_seconds.observe(seconds, type=file_type)
+        parse_bytes.observe(stat.st_size, type=file_type)
+        read_bytes_total.inc(stat.st_size, type=file_type)
+        logger.debug('parsed %s: %d rows, %d columns, %d bytes in %.3f s', filename,
+                     0 if df is None else len(df), 0 if df is None else len(df.columns), stat.st_size, seconds)
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.pool == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def iter_parse_files(self, filenames, columns=None, dtype=None):
+        # parse several files in parallel with a thread or process pool, yields (filename, DataFrame, exception)
+        # as soon as a file is done (completion order). DataFrame is None if the file could not be parsed
+        if len(filenames) <= 1 or self.max_workers == 1:
+            for filename in filenames:
+                try:
+                    yield filename, self.parse_file(filename, columns, dtype), None
+                except Exception as e:
+                    yield filename, None, e
+            return
+        futures = {}
+        for filename in filenames:
+            if self.pool != 'process':
+                futures[self._get_executor().submit(self.parse_file, filename, columns, dtype)] = (filename, None,
+                                                                                                 None)
+                continue
+            # cached files are taken from this process, only the parsing itself runs in the worker processes
+            try:
+                stat, df, parse_columns = self._cache_lookup(filename, columns, dtype)
+                if df is None:
+                    df = self._load_sidecar(filename, stat, parse_columns, dtype)
+            except Exception as e:
+                yield filename, None, e
+                continue
+            if df is not None:
+                yield filename, self._project(df, columns), None
+                continue
+            futures[self._get_executor().submit(_read_file_in_process, filename, self.plt_engine, parse_columns,
+                                                dtype)] = (filename, stat, parse_columns)
+        for future in as_completed(futures):
+            filename, stat, parse_columns = futures[future]
+            try:
+                df = future.result()
+            except Exception as e:
+                yield filename, None, e
+                continue
+            if stat is not None:
+                df, seconds = df
+                self._observe_parse(filename, stat, df, seconds)
+                if df is not None:
+                    self._store_parsed(filename, stat, df, parse_columns, dtype)
+                    df = self._project(df, columns)
+            yield filename, df, None
+
+    def parse_files(self, filenames, columns=None, dtype=None):
+        # parse several files in parallel, see iter_parse_files
+        # returns the DataFrames in the order of filenames (None if a file could not be parsed)
+        # and a dict {filename: exception} of the files which failed
+        frames = {}
+        errors = {}
+        for filename, df, error in self.iter_parse_files(filenames, columns, dtype):
+            if error is not None:
+                errors[filename] = error
+            else:
+                frames[filename] = df
+        return [frames.get(filename) for filename in filenames], errors
+
+    def load_files(self, filenames, columns=None, dtype=None):
+        # parse_files result as multi_file_frame.MultiFileFrame (files which could not be read are left out)
+        frames, errors = self.parse_files(filenames, columns, dtype)
+        return MultiFileFrame(filenames, frames), errors
+
+    def _data_start(self, filename):
+        # column names and byte offset of the first data row (.plt: line after "Data {", .csv: line after header)
+        with open(filename, 'rb') as f:
+            if filename.split('.')[-1] == 'plt':
+                columns = self._parse_plt_datasets(line.decode() for line in f)
+                for line in f:
+                    if b"Data" in line:
+                        break
+                return columns, f.tell()
+            header = f.readline()
+        return pd.read_csv(io.BytesIO(header)).columns.to_list(), len(header)
 
+    def follow_position(self, filename, df, count_rows=True):
+        # read_appended position after the rows of df, a parse of the file. The numpy .plt parser records where it
+        # stopped, otherwise the rows of df are counted in the file (count_rows False: None is returned instead)
+        data_end = df.attrs.get('data_end')
+        if data_end is not None:
+            return {'offset': data_end['offset'], 'columns': data_end['columns'], 'rest': list(data_end['rest'])}
+        return self.position_after_rows(filename, len(df)) if count_rows else None
+
+    def position_after_rows(self, filename, n_rows):
+        # read_appended position after the first n_rows rows of the file: values are counted from the first data
+        # row (.plt rows may be wrapped over several lines), for .csv the non-empty lines. Values read beyond the
+        # rows, or of an incomplete last row, are kept as rest so that the next rows stay aligned
+        columns, offset = self._data_start(filename)
+        is_plt = filename.split('.')[-1] == 'plt'
+        length = len(columns) if is_plt else 1
+        needed = n_rows * length
+        count = 0
+        rest = []
+        with open(filename, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if count >= needed:
+                    break
+                block_end = line.find(b"}") if is_plt else -1
+                if block_end >= 0:
+                    line = line[:block_end]
+                elif not line.endswith(b"\n"):
+                    # the last line may still be written
+                    break
+                tokens = line.split() if is_plt else line.split()[:1]
+                count += len(tokens)
+                offset += len(line)
+                if count > needed:
+                    # values beyond the rows belong to the next rows
+                    rest = tokens[len(tokens) - (count - needed):]
+                    break
+                # values of the row which is not complete yet
+                rest = (rest + tokens)[-(count % length):] if count % length else []
+                if block_end >= 0:
+                    break
+        return {'offset': offset, 'columns': columns, 'rest': [float(value) for value in rest]}
+
+    def read_appended(self, filename, position=None, columns=None):
+        # rows appended to a growing file since position, only the new bytes are read and parsed.
+        # returns the new rows and the position to continue from. position None starts at the first row; if the
+        # file became shorter than position it was rewritten and is read from the start ('restarted' is set)
+        size = os.stat(filename).st_size
+        restarted = position is not None and size < position['offset']
+        if position is None or restarted:
+            data_columns, offset = self._data_start(filename)
+            position = {'offset': offset, 'columns': data_columns, 'rest': []}
+        with open(filename, 'rb') as f:
+            f.seek(position['offset'])
+            chunk = f.read(max(0, size - position['offset']))
+        block_end = chunk.find(b"}") if filename.split('.')[-1] == 'plt' else -1
+        if block_end >= 0:
+            chunk = chunk[:block_end]
+        else:
+            # only complete lines, the last line may still be written
+            chunk = chunk[:chunk.rfind(b"\n") + 1]
+        new_position = {'offset': position['offset'] + len(chunk), 'columns': position['columns'],
+                        'rest': position['rest'], 'restarted': restarted}
+        data_columns = position['columns']
 
-    def parse_file(self, filename):
         if filename.split('.')[-1] == 'csv':
-            data = pd.read_csv(filename)
+            if chunk.strip():
+                df = pd.read_csv(io.BytesIO(chunk), header=None, names=data_columns,
+                                 usecols=None if columns is None else lambda c: c in columns)
+            else:
+                df = pd.DataFrame(columns=[c for c in data_columns if columns is None or c in columns], dtype='float64')
+            for col in df.columns:
+                if not pd.api.types.is_numeric_dtype(df[col]):
+                    df[col] = pd.to_numeric(df[col], errors='coerce')
+            if 'arc_length' in df.columns:
+                df['arc_length'] = df['arc_length'] * 1.0e4
+            return df, new_position
+
+        length = len(data_columns)
+        values = np.empty(0)
+        if chunk and not chunk.isspace():
+            with warnings.catch_warnings():
+                warnings.simplefilter('error', DeprecationWarning)
+                try:
+                    values = np.fromstring(chunk, dtype='float64', sep=' ')
+                except DeprecationWarning:
+                    raise ValueError(f'{filename}: non-numeric value in appended data') from None
+        if position['rest']:
+            values = np.concatenate([position['rest'], values])
+        n_rows = len(values) // length
+        new_position['rest'] = values[n_rows * length:].tolist()
+        keep = [i for i, name in enumerate(data_columns) if columns is None or name in columns]
+        return pd.DataFrame(values[:n_rows * length].reshape(n_rows, length)[:, keep],
+                            columns=[data_columns[i] for i in keep]), new_position
+
+    def _read_file(self, filename, columns=None, dtype=None):
+        if filename.split('.')[-1] == 'csv':
+            data = pd.read_csv(filename, usecols=None if columns is None else lambda c: c in columns)
+            # only columns which were not read as numbers need a conversion
             for col in data.columns:
-                data[col] = pd.to_numeric(data[col], errors='coerce')
+                if not pd.api.types.is_numeric_dtype(data[col]):
+                    data[col] = pd.to_numeric(data[col], errors='coerce')
+            if dtype is not None:
+                data = data.astype(dtype)
             if 'arc_length' in data.columns:
                 data['arc_length'] = data['arc_length'] * 1.0e4
-            data['file'] = filename
             return data
 
         if filename.split('.')[-1] == 'plt':
-            # f = open(filename)
-            with open(filename) as f:
-                datasets = []
-                functions = []
-                data = []
-                # Extract datasets
-                for line in f:
-                    if "datasets" in line:
-                        break
+            if self.plt_engine == 'numpy':
+                return self._read_plt_numpy(filename, columns, dtype)
+            return self._read_plt_python(filename, columns, dtype)
 
-                for line in f:
-                    datasets.append(line.rstrip().split("\""))
-                    if "]" in line:
-                        break
-                # Flatten datasets list
-                datasets = [item for sublist in datasets for item in sublist]
-                # Remove empty strings
-                datasets = list(filter(None, [item.strip() for item in datasets]))[:-1]
-                length = len(datasets)
+    @staticmethod
+    def _parse_plt_datasets(lines):
+        # lines: iterator over the file lines, consumed up to the end of the datasets [...] block
+        datasets = []
+        for line in lines:
+            if "datasets" in line:
+                break
 
-                # Extract data
-                for line in f:
-                    if "Data" in line:
-                        break
-                for line in f:
-                    data.append(line.rstrip().split(" "))
-                    if "}" in line:
-                        break
-                # Flatten data list
-                data = [item for sublist in data for item in sublist]
-                # Remove empty strings
-                data = ' '.join(data).split()[:-1]
-                # Split data in rows
-                data = [data[x:x + length] for x in range(0, len(data), length)]
-
-                df = pd.DataFrame(data, columns=datasets, dtype='float64')
-                df['file'] = filename
-                return df
+        for line in lines:
+            datasets.append(line.rstrip().split("\""))
+            if "]" in line:
+                break
+        # Flatten datasets list
+        datasets = [item for sublist in datasets for item in sublist]
+        # Remove empty strings
+        return list(filter(None, [item.strip() for item in datasets]))[:-1]
+
+    def _read_plt_python(self, filename, columns=None, dtype=None):
+        with open(filename) as f:
+            data = []
+            # Extract datasets
+            datasets = self._parse_plt_datasets(f)
+            length = len(datasets)
+
+            # Extract data
+            for line in f:
+                if "Data" in line:
+                    break
+            for line in f:
+                data.append(line.rstrip().split(" "))
+                if "}" in line:
+                    break
+            # Flatten data list
+            data = [item for sublist in data for item in sublist]
+            # Remove empty strings
+            data = ' '.join(data).split()[:-1]
+            # Split data in rows
+            data = [data[x:x + length] for x in range(0, len(data), length)]
+
+            df = pd.DataFrame(data, columns=datasets, dtype='float64')
+            if columns is not None:
+                df = df[[c for c in datasets if c in columns]]
+            return df if dtype is None else df.astype(dtype)
+
+    @staticmethod
+    def _one_row_per_line(mm, start, end, length):
+        # the first and the last line of the data block hold exactly one row each
+        first_end = mm.find(b"\n", start, end)
+        first = mm[start:end if first_end < 0 else first_end]
+        tail = mm[max(start, end - 64 * 1024):end].rstrip()
+        return len(first.split()) == length and len(tail[tail.rfind(b"\n") + 1:].split()) == length
+
+    @staticmethod
+    def _read_plt_rows(mm, start, end, datasets, keep, dtype=None):
+        # data block with one row per line: the line parser only converts the kept columns, the others are just
+        # split, which is what makes a projection cheaper than a full parse. None if the block does not fit
+        try:
+            df = pd.read_csv(_MappedBlock(mm, start, end), sep=r'\s+', header=None, usecols=keep, dtype='float64',
+                             engine='c', float_precision='round_trip')
+        except ValueError:
+            return None
+        df.columns = [datasets[i] for i in keep]
+        if dtype is not None:
+            df = df.astype(dtype)
+        df.attrs['data_end'] = {'offset': end, 'columns': datasets, 'rest': []}
+        return df
+
+    def _read_plt_numpy(self, filename, columns=None, dtype=None, chunk_bytes=64 * 1024 ** 2):
+        # tokenize the Data {...} block chunk by chunk from a memory map, only the requested columns of every
+        # chunk are kept so that the memory needed is about the size of the result. A projection of a block with
+        # one row per line is read by the line parser instead, which skips the conversion of the other columns
+        with open(filename, 'rb') as f:
+            datasets = self._parse_plt_datasets(line.decode() for line in f)
+            length = len(datasets)
+            keep = [i for i, name in enumerate(datasets) if columns is None or name in columns]
+            for line in f:
+                if b"Data" in line:
+                    break
+            start = f.tell()
+            parts = []
+            rest = np.empty(0)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = mm.find(b"}", start)
+                if end < 0:
+                    # no end of the block: the file is still being written, only complete lines are read
+                    end = max(start, mm.rfind(b"\n", start) + 1)
+                if len(keep) < length and self._one_row_per_line(mm, start, end, length):
+                    df = self._read_plt_rows(mm, start, end, datasets, keep, dtype)
+                    if df is not None:
+                        return df
+                with warnings.catch_warnings():
+                    # numpy only warns if a token is not a number, fall back to the line based parser in that case
+                    warnings.simplefilter('error', DeprecationWarning)
+                    while start < end:
+                        stop = min(end, start + chunk_bytes)
+                        if stop < end:
+                            # chunks end at a line break so that no number is split
+                            newline = mm.find(b"\n", stop, end)
+                            stop = end if newline < 0 else newline + 1
+                        chunk = mm[start:stop]
+                        start = stop
+                        if chunk.isspace():
+                            continue
+                        try:
+                            values = np.fromstring(chunk, dtype='float64', sep=' ')
+                        except (DeprecationWarning, ValueError):
+                            return self._read_plt_python(filename, columns, dtype)
+                        del chunk
+                        if len(rest):
+                            values = np.concatenate([rest, values])
+                        n_rows = len(values) // length
+                        rows = values[:n_rows * length].reshape(n_rows, length)
+                        parts.append(rows[:, keep].astype(dtype or 'float64', copy=False))
+                        rest = values[n_rows * length:]
+        # pad an incomplete last row with NaN like the line based parser does
+        if len(rest):
+            row = np.full(length, np.nan)
+            row[:len(rest)] = rest
+            parts.append(row[None, keep].astype(dtype or 'float64'))
+        if len(parts) == 1:
+            data = parts[0]
+        elif parts:
+            data = np.concatenate(parts)
+        else:
+            data = np.empty((0, len(keep)), dtype=dtype or 'float64')
+        df = pd.DataFrame(data, columns=[datasets[i] for i in keep], copy=False)
+        # where live mode continues after this parse (see follow_position), the values of an incomplete last row
+        # are kept to be completed by the next rows
+        df.attrs['data_end'] = {'offset': end, 'columns': datasets, 'rest': rest.tolist()}
+        return df
+
+
+class _MappedBlock:
+    # file-like view of mm[start:end] for the pandas parser, without copying the block
+    def __init__(self, mm, start, end):
+        self.mm = mm
+        self.position = start
+        self.end = end
+
+    def read(self, size=-1):
+        stop = self.end if size is None or size < 0 else min(self.end, self.position + size)
+        data = self.mm[self.position:stop]
+        self.position = stop
+        return data
 
 
+def _read_file_in_process(filename, plt_engine, columns=None, dtype=None):
+    # parse time is measured in the worker and recorded by the parent process
+    start = time.perf_counter()
+    df = GetData(plt_engine=plt_engine)._read_file(filename, columns, dtype)
+    return df, time.perf_counter() - start
 
 
 if __name__ == '__main__':
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+
+def _condition_mask(series, condition):
+    # mask for one AG Grid filter condition (number or text filter)
+    filter_type = condition.get('type')
+    if filter_type == 'blank':
+        return series.isna()
+    if filter_type == 'notBlank':
+        return series.notna()
+
+    if condition.get('filterType') == 'text':
+        text = series.astype(str).str.lower()
+        value = str(condition.get('filter', '')).lower()
+        if filter_type == 'contains':
+            return text.str.contains(value, regex=False)
+        if filter_type == 'notContains':
+            return ~text.str.contains(value, regex=False)
+        if filter_type == 'equals':
+            return text == value
+        if filter_type == 'notEqual':
+            return text != value
+        if filter_type == 'startsWith':
+            return text.str.startswith(value)
+        if filter_type == 'endsWith':
+            return text.str.endswith(value)
+        return pd.Series(True, index=series.index)
+
+    value = condition.get('filter')
+    if value is None:
+        return pd.Series(True, index=series.index)
+    if filter_type == 'equals':
+        return series == value
+    if filter_type == 'notEqual':
+        return series != value
+    if filter_type == 'lessThan':
+        return series < value
+    if filter_type == 'lessThanOrEqual':
+        return series <= value
+    if filter_type == 'greaterThan':
+        return series > value
+    if filter_type == 'greaterThanOrEqual':
+        return series >= value
+    if filter_type == 'inRange':
+        return (series >= value) & (series <= condition.get('filterTo', value))
+    return pd.Series(True, index=series.index)
+
+
+def apply_filter_model(df, filter_model):
+    # filterModel of the AG Grid request: {column: condition} or {column: {operator, conditions}}
+    if not filter_model:
+        return df
+    mask = np.ones(len(df), dtype=bool)
+    for col, model in filter_model.items():
+        if col not in df.columns:
+            continue
+        if 'conditions' in model:
+            masks = [_condition_mask(df[col], c).to_numpy() for c in model['conditions']]
+            if model.get('operator') == 'OR':
+                mask &= np.logical_or.reduce(masks)
+            else:
+                mask &= np.logical_and.reduce(masks)
+        else:
+            mask &= _condition_mask(df[col], model).to_numpy()
+    return df[mask]
+
+
+def apply_sort_model(df, sort_model):
+    # sortModel of the AG Grid request: [{'colId': column, 'sort': 'asc' | 'desc'}, ...]
+    sort_model = [s for s in sort_model or [] if s['colId'] in df.columns]
+    if not sort_model:
+        return df
+    return df.sort_values([s['colId'] for s in sort_model], ascending=[s['sort'] == 'asc' for s in sort_model],
+                          kind='stable')
+
+
+def get_rows_response(df, request):
+    # one block of rows for the infinite row model
+    start = request.get('startRow', 0)
+    end = request.get('endRow', start + 100)
+    return {'rowData': df.iloc[start:end].to_dict('records'), 'rowCount': len(df)}
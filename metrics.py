@@ -0,0 +1,200 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from dash.exceptions import PreventUpdate
+
+
+# default buckets: durations in seconds and payload sizes in bytes
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTE_BUCKETS = tuple(2.0 ** i for i in range(10, 31, 2))
+
+
+def _format_labels(labels):
+    labels = list(labels)
+    if not labels:
+        return ''
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(str(labels.get(name, '')) for name in self.labelnames), 0)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    # cumulative bucket counts, sum and count per label combination, rendered in the Prometheus text format
+    def __init__(self, name, documentation, labelnames=(), buckets=TIME_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        entry = self._values.get(tuple(str(labels.get(name, '')) for name in self.labelnames))
+        return 0 if entry is None else entry[2]
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                labels = list(zip(self.labelnames, key))
+                cumulative = 0
+                for bound, n in zip(self.buckets, counts):
+                    cumulative += n
+                    lines.append(f'{self.name}_bucket{_format_labels(labels + [("le", _format_value(bound))])} '
+                                 f'{cumulative}')
+                lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(total)}')
+                lines.append(f'{self.name}_count{_format_labels(labels)} {count}')
+        return lines
+
+
+class Gauge:
+    # value read at scrape time from func, func returns a number or a dict {label value tuple: number}
+    def __init__(self, name, documentation, func, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.func = func
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} gauge']
+        values = self.func()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in sorted(values.items()):
+            lines.append(f'{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(value)}')
+        return lines
+
+
+class Registry:
+    # metrics of this process, metrics with the same name are created once and shared
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, name, factory):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = factory()
+            return self._metrics[name]
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(name, lambda: Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=TIME_BUCKETS):
+        return self._get_or_create(name, lambda: Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, func, labelnames=()):
+        return self._get_or_create(name, lambda: Gauge(name, documentation, func, labelnames))
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        # Prometheus text exposition format (version 0.0.4)
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines += metric.render()
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+callback_seconds = registry.histogram('dash_plt_callback_seconds', 'Duration of Dash callbacks', ['callback'])
+callback_errors = registry.counter('dash_plt_callback_errors_total', 'Dash callbacks which raised an exception',
+                                   ['callback'])
+
+
+def timed(name):
+    # decorator: duration of every call in dash_plt_callback_seconds{callback=name}
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except PreventUpdate:
+                raise
+            except Exception:
+                callback_errors.inc(callback=name)
+                raise
+            finally:
+                callback_seconds.observe(time.perf_counter() - start, callback=name)
+        return wrapper
+    return decorator
+
+
+class StepTimer:
+    # durations of the steps of one call, every step is observed in histogram{step=name} and kept for logging
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.steps = {}
+
+    @contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.steps[name] = self.steps.get(name, 0.0) + seconds
+            self.histogram.observe(seconds, step=name)
+
+    def summary(self):
+        return ', '.join(f'{name} {seconds * 1e3:.1f} ms' for name, seconds in self.steps.items())
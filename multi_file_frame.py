@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+
+class MultiFileFrame:
+    # parsed files of one selection, one DataFrame per file in selection order.
+    # Traces are taken from the per-file frames directly, a combined table with a categorical file column is
+    # only built on request (data table)
+    def __init__(self, filenames, frames):
+        self._frames = {filename: df for filename, df in zip(filenames, frames) if df is not None}
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __iter__(self):
+        return iter(self._frames.items())
+
+    def files(self):
+        return list(self._frames)
+
+    def frame(self, filename):
+        return self._frames[filename]
+
+    def columns(self):
+        columns = []
+        for df in self._frames.values():
+            columns += [c for c in df.columns if c not in columns]
+        return columns
+
+    def offsets(self):
+        # first row of every file in the combined table, plus the total number of rows
+        return np.concatenate([[0], np.cumsum([len(df) for df in self._frames.values()])])
+
+    def to_table(self):
+        if len(self._frames) == 0:
+            return pd.DataFrame()
+        table = pd.concat(list(self._frames.values()), ignore_index=True)
+        lengths = np.diff(self.offsets())
+        table['file'] = pd.Categorical.from_codes(np.repeat(np.arange(len(lengths)), lengths),
+                                                  categories=self.files())
+        return table
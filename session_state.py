@@ -0,0 +1,427 @@
+import numpy as np
+import os
+import io
+import json
+import uuid
+import hashlib
+import threading
+import time
+import weakref
+import logging
+from functools import wraps
+from collections import OrderedDict
+from curve_store import CurveStore
+
+logger = logging.getLogger(__name__)
+
+
+class SessionState:
+    # everything that belongs to one browser session: loaded files, current selection and saved curves
+    def __init__(self):
+        self.file_list = []
+        self.file_list_short = []
+        self.current_item_container = []
+        self.data_container = CurveStore()
+        self.curve_save_counter = 1
+        # live mode: GetData.read_appended position per plotted file, with the index of its trace ('trace')
+        self.follow = {}
+
+    def save_file_to_file_list(self, filelist, root=None):
+        # root: short names are the paths relative to root (files of different folders may have the same name),
+        # otherwise the file names
+        for file in filelist:
+            if file not in self.file_list:
+                self.file_list.append(file)
+                self.file_list_short.append(os.path.relpath(file, root) if root else file.split('/')[-1])
+        return self.file_list, self.file_list_short
+
+    # attributes written back by SessionStore with the key of their description in to_dict
+    FIELDS = {'file_list': 'file_list', 'file_list_short': 'file_list_short',
+              'current_item_container': 'current_item_container', 'curve_save_counter': 'curve_save_counter',
+              'follow': 'follow', 'data_container': 'curves'}
+
+    def snapshot(self):
+        # comparable description of every attribute (arrays by identity) to find the attributes a callback changed
+        data = self.to_dict(id)
+        return {name: json.dumps(data[key], sort_keys=True, default=str) for name, key in self.FIELDS.items()}
+
+    def file_path(self, file_short):
+        return self.file_list[self.file_list_short.index(file_short)]
+
+    def to_dict(self, array_ref):
+        # JSON compatible description, arrays are replaced by the keys returned by array_ref(array)
+        return {'file_list': self.file_list, 'file_list_short': self.file_list_short,
+                'current_item_container': self.current_item_container,
+                'curve_save_counter': self.curve_save_counter,
+                'follow': self.follow,
+                'curves': [{'identifier': c.identifier, 'name': c.name, 'label': c.label, 'x_factor': c.x_factor,
+                            'y_factor': c.y_factor, 'x': array_ref(c.x), 'y': array_ref(c.y)}
+                           for c in self.data_container]}
+
+    @classmethod
+    def from_dict(cls, data, array_load):
+        state = cls()
+        state.file_list = data['file_list']
+        state.file_list_short = data['file_list_short']
+        state.current_item_container = data['current_item_container']
+        state.curve_save_counter = data['curve_save_counter']
+        state.follow = data.get('follow', {})
+        arrays = {}
+        for c in data['curves']:
+            for key in (c['x'], c['y']):
+                if key not in arrays:
+                    arrays[key] = array_load(key)
+            curve = state.data_container.add(c['identifier'], c['name'], arrays[c['x']], arrays[c['y']],
+                                             c['label'])
+            curve.x_factor = c['x_factor']
+            curve.y_factor = c['y_factor']
+        return state
+
+
+def new_session_id():
+    return uuid.uuid4().hex
+
+
+class MemoryBackend:
+    # sessions of one process, the SessionState objects are kept as they are. Sessions not used for ttl seconds
+    # are dropped, as are the least recently used ones beyond max_sessions (every browser tab is a new session)
+    def __init__(self, ttl=24 * 3600, max_sessions=1000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        # session id: (state, time of the last use), least recently used first
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        while self._sessions:
+            session_id, (state, used) = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and used + self.ttl >= now:
+                break
+            del self._sessions[session_id]
+            logger.debug('session evicted: %s', session_id)
+
+    def get(self, session_id):
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            self._sessions[session_id] = (entry[0], now)
+            self._sessions.move_to_end(session_id)
+            return entry[0]
+
+    def set(self, session_id, state):
+        now = time.time()
+        with self._lock:
+            self._sessions[session_id] = (state, now)
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+class KeyValueBackend:
+    # sessions in a key-value store with the redis client interface (get, set, exists, delete).
+    # The session itself is a small JSON document, curve arrays are stored once under the hash of their content
+    # and only referenced from the session so that unchanged curves are not written again.
+    def __init__(self, client, prefix='dash_plt', ttl=7 * 24 * 3600, array_cache_bytes=512 * 1024 ** 2):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self._refs = {}
+        # recently loaded arrays by key, reused by the next requests so that their curve indexes stay valid
+        self.array_cache_bytes = array_cache_bytes
+        self._arrays = OrderedDict()
+        self._arrays_bytes = 0
+        self._lock = threading.Lock()
+
+    def _array_ref(self, array):
+        with self._lock:
+            entry = self._refs.get(id(array))
+            if entry is not None and entry[0]() is array:
+                key = entry[1]
+            else:
+                key = f'{self.prefix}:array:{hashlib.sha1(np.ascontiguousarray(array).view(np.uint8)).hexdigest()}'
+                self._refs[id(array)] = (weakref.ref(array, lambda _, i=id(array): self._refs.pop(i, None)), key)
+        if self.client.exists(key):
+            self.client.expire(key, self.ttl)
+        else:
+            buffer = io.BytesIO()
+            np.save(buffer, array, allow_pickle=False)
+            self.client.set(key, buffer.getvalue(), ex=self.ttl)
+        return key
+
+    def _array_load(self, key):
+        with self._lock:
+            array = self._arrays.get(key)
+            if array is not None:
+                self._arrays.move_to_end(key)
+                return array
+        blob = self.client.get(key)
+        if blob is None:
+            raise KeyError(key)
+        # copy to get an array that owns its memory, see curve_store.Curve
+        array = np.load(io.BytesIO(blob), allow_pickle=False).copy()
+        array.flags.writeable = False
+        with self._lock:
+            self._refs[id(array)] = (weakref.ref(array, lambda _, i=id(array): self._refs.pop(i, None)), key)
+            if array.nbytes <= self.array_cache_bytes and key not in self._arrays:
+                self._arrays[key] = array
+                self._arrays_bytes += array.nbytes
+                while self._arrays_bytes > self.array_cache_bytes:
+                    self._arrays_bytes -= self._arrays.popitem(last=False)[1].nbytes
+        return array
+
+    def get(self, session_id):
+        blob = self.client.get(f'{self.prefix}:session:{session_id}')
+        if blob is None:
+            return None
+        try:
+            return SessionState.from_dict(json.loads(blob), self._array_load)
+        except (KeyError, ValueError) as e:
+            logger.warning('session state could not be restored: %s: %s', session_id, e)
+            return None
+
+    def set(self, session_id, state):
+        blob = json.dumps(state.to_dict(self._array_ref))
+        self.client.set(f'{self.prefix}:session:{session_id}', blob.encode(), ex=self.ttl)
+
+    def delete(self, session_id):
+        self.client.delete(f'{self.prefix}:session:{session_id}')
+
+
+class LocalRedis:
+    # in-process stand-in for a redis client, supports the commands used by KeyValueBackend. Expired keys are
+    # removed when they are accessed and by a sweep of all keys at most every sweep_interval seconds
+    def __init__(self, sweep_interval=600):
+        self._data = {}
+        self._lock = threading.Lock()
+        self.sweep_interval = sweep_interval
+        self._next_sweep = time.time() + sweep_interval
+
+    def _alive(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] < time.time():
+            del self._data[key]
+            return None
+        return entry
+
+    def _sweep(self):
+        now = time.time()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        for key in [key for key, (value, expiry) in self._data.items() if expiry is not None and expiry < now]:
+            del self._data[key]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._alive(key)
+            return None if entry is None else entry[0]
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = (value if isinstance(value, bytes) else str(value).encode(),
+                               time.time() + ex if ex else None)
+            self._sweep()
+        return True
+
+    def exists(self, key):
+        with self._lock:
+            return int(self._alive(key) is not None)
+
+    def expire(self, key, seconds):
+        with self._lock:
+            entry = self._alive(key)
+            if entry is None:
+                return 0
+            self._data[key] = (entry[0], time.time() + seconds)
+            return 1
+
+    def delete(self, key):
+        with self._lock:
+            return int(self._data.pop(key, None) is not None)
+
+
+class DiskClient:
+    # redis-like key-value client on a local folder (one file per key), shared by all workers of one machine.
+    # The expiry time of a key is kept as modification time of its file (NO_EXPIRY: the key does not expire),
+    # expired files are removed when they are accessed and by a sweep of the folder at most every sweep_interval
+    # seconds
+    NO_EXPIRY = 0
+
+    def __init__(self, directory, sweep_interval=600):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        self.sweep_interval = sweep_interval
+        self._next_sweep = time.time()
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key.replace(':', '_'))
+
+    def _expired(self, stat, now):
+        return stat.st_mtime != self.NO_EXPIRY and stat.st_mtime < now
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _alive(self, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        if self._expired(stat, time.time()):
+            self._remove(path)
+            return False
+        return True
+
+    def sweep(self):
+        # remove the expired keys and temporary files left behind by interrupted writes
+        now = time.time()
+        removed = 0
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if entry.name.endswith('.tmp'):
+                expired = stat.st_ctime < now - 3600
+            else:
+                expired = self._expired(stat, now)
+            if expired and self._remove(entry.path):
+                removed += 1
+        if removed:
+            logger.debug('%d expired keys removed from %s', removed, self.directory)
+        return removed
+
+    def _sweep_if_due(self):
+        with self._lock:
+            now = time.time()
+            if now < self._next_sweep:
+                return
+            self._next_sweep = now + self.sweep_interval
+        self.sweep()
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                if not self._expired(os.fstat(f.fileno()), time.time()):
+                    return f.read()
+        except FileNotFoundError:
+            return None
+        self._remove(path)
+        return None
+
+    def set(self, key, value, ex=None):
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(value if isinstance(value, bytes) else str(value).encode())
+        expiry = time.time() + ex if ex else self.NO_EXPIRY
+        os.utime(tmp_path, (time.time(), expiry))
+        os.replace(tmp_path, path)
+        self._sweep_if_due()
+        return True
+
+    def exists(self, key):
+        return int(self._alive(self._path(key)))
+
+    def expire(self, key, seconds):
+        path = self._path(key)
+        if not self._alive(path):
+            return 0
+        try:
+            os.utime(path, (time.time(), time.time() + seconds))
+            return 1
+        except FileNotFoundError:
+            return 0
+
+    def delete(self, key):
+        return int(self._remove(self._path(key)))
+
+
+def DiskBackend(directory, **kwargs):
+    return KeyValueBackend(DiskClient(directory), **kwargs)
+
+
+def RedisBackend(url, **kwargs):
+    try:
+        import redis
+    except ImportError:
+        raise ImportError('the redis session backend needs the redis package: pip install redis') from None
+    return KeyValueBackend(redis.Redis.from_url(url), **kwargs)
+
+
+def make_backend(spec):
+    # spec: 'memory', 'disk:<folder>' or 'redis://host:port/db'
+    if not spec or spec == 'memory':
+        return MemoryBackend()
+    if spec.startswith('disk:'):
+        return DiskBackend(spec[len('disk:'):])
+    if spec.startswith('redis://') or spec.startswith('rediss://'):
+        return RedisBackend(spec)
+    raise ValueError(f'unknown session backend: {spec}')
+
+
+class SessionStore:
+    def __init__(self, backend):
+        self.backend = backend
+        self._locks = weakref.WeakValueDictionary()
+        self._locks_lock = threading.Lock()
+
+    def lock(self, session_id):
+        # lock of one session, callbacks of the same session change its state one after the other in this process
+        with self._locks_lock:
+            lock = self._locks.get(session_id)
+            if lock is None:
+                lock = self._locks[session_id] = threading.RLock()
+            return lock
+
+    def load(self, session_id):
+        state = self.backend.get(session_id) if session_id else None
+        return SessionState() if state is None else state
+
+    def save(self, session_id, state):
+        if session_id:
+            self.backend.set(session_id, state)
+
+    def save_changes(self, session_id, state, before):
+        # only the attributes changed since the snapshot before are written, on top of the stored state, so that
+        # changes of other processes to the other attributes are kept. Nothing is written if nothing changed
+        changed = [name for name, value in state.snapshot().items() if before[name] != value]
+        if not changed or not session_id:
+            return False
+        latest = self.backend.get(session_id)
+        if latest is not None and latest is not state:
+            for name in changed:
+                setattr(latest, name, getattr(state, name))
+            state = latest
+        self.save(session_id, state)
+        return True
+
+    def with_state(self, save=True):
+        # decorator for callbacks with the session id as last argument, the callback gets the SessionState instead
+        # and the changed attributes are written back after the callback returned
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args):
+                session_id = args[-1]
+                with self.lock(session_id):
+                    state = self.load(session_id)
+                    before = state.snapshot() if save else None
+                    result = func(*args[:-1], state)
+                    if save:
+                        self.save_changes(session_id, state, before)
+                return result
+            return wrapper
+        return decorator
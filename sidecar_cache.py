@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SidecarCache:
+    # On-disk cache of parsed files. Every source file gets its own folder inside cache_dir holding one .npy
+    # file per column (named by the hash of the column name) plus meta.json (source path, mtime, size, column
+    # order). Columns are memory mapped on load.
+    # entries written in another layout are dropped
+    FORMAT = 2
+
+    def __init__(self, cache_dir, max_bytes=4 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_dir(self, filename):
+        key = hashlib.sha1(os.path.abspath(filename).encode()).hexdigest()
+        return os.path.join(self.cache_dir, key)
+
+    @staticmethod
+    def _column_file(name):
+        return hashlib.sha1(name.encode()).hexdigest()[:20] + '.npy'
+
+    @staticmethod
+    def _tmp_path(path):
+        # unique per process and thread, writers of the same entry must not share a temporary file
+        return f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+    def _read_meta(self, filename, stat):
+        entry_dir = self._entry_dir(filename)
+        try:
+            with open(os.path.join(entry_dir, 'meta.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('format') != self.FORMAT or meta['mtime_ns'] != stat.st_mtime_ns or meta['size'] != stat.st_size:
+            # source file changed, entry is stale
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+        return meta
+
+    def load(self, filename, stat, columns=None):
+        # return DataFrame of memory mapped columns or None if there is no valid entry holding the columns
+        meta = self._read_meta(filename, stat)
+        if meta is None:
+            return None
+        if not meta.get('complete', True) and (columns is None or not set(columns).issubset(meta['columns'])):
+            return None
+        entry_dir = self._entry_dir(filename)
+        names = meta['columns'] if columns is None else [c for c in meta['columns'] if c in columns]
+        try:
+            data = {name: np.load(os.path.join(entry_dir, self._column_file(name)), mmap_mode='r') for name in names}
+        except (OSError, ValueError):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+        # mark entry as recently used for eviction
+        os.utime(os.path.join(entry_dir, 'meta.json'))
+        return pd.DataFrame(data, columns=names, copy=False)
+
+    def store(self, filename, stat, df, complete=True):
+        # complete: df holds all columns of the file, otherwise the columns are added to an existing entry
+        entry_dir = self._entry_dir(filename)
+        columns = list(df.columns)
+        meta = None if complete else self._read_meta(filename, stat)
+        if meta is not None and not meta.get('complete', True):
+            new_columns = [c for c in columns if c not in meta['columns']]
+            if not new_columns:
+                return
+            try:
+                # column files are replaced atomically, other writers may add the same column at the same time
+                for name in new_columns:
+                    path = os.path.join(entry_dir, self._column_file(name))
+                    with open(self._tmp_path(path), 'wb') as f:
+                        np.save(f, np.ascontiguousarray(df[name].to_numpy()))
+                    os.replace(self._tmp_path(path), path)
+                # columns added by other writers meanwhile are kept, an entry replaced or removed meanwhile is left
+                # as it is
+                meta = self._read_meta(filename, stat)
+                if meta is not None and not set(new_columns).issubset(meta['columns']):
+                    meta['columns'] += [c for c in new_columns if c not in meta['columns']]
+                    path = os.path.join(entry_dir, 'meta.json')
+                    with open(self._tmp_path(path), 'w') as f:
+                        json.dump(meta, f)
+                    os.replace(self._tmp_path(path), path)
+            except OSError as e:
+                logger.warning('sidecar cache: could not store %s: %s', filename, e)
+            self.evict()
+            return
+        if meta is not None:
+            # a complete entry exists already
+            return
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix='.tmp_')
+        try:
+            for name in columns:
+                np.save(os.path.join(tmp_dir, self._column_file(name)), np.ascontiguousarray(df[name].to_numpy()))
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+                json.dump({'format': self.FORMAT, 'source': os.path.abspath(filename), 'mtime_ns': stat.st_mtime_ns,
+                           'size': stat.st_size, 'columns': columns, 'rows': len(df), 'complete': complete}, f)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+        except OSError as e:
+            logger.warning('sidecar cache: could not store %s: %s', filename, e)
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+        self.evict()
+
+    def evict(self):
+        # remove least recently used entries until the cache folder fits into max_bytes
+        try:
+            self._evict()
+        except OSError as e:
+            logger.warning('sidecar cache: could not evict entries: %s', e)
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for item in os.scandir(self.cache_dir):
+            if not item.is_dir() or item.name.startswith('.tmp_'):
+                continue
+            # entries may be replaced or removed meanwhile by other threads or workers, these are skipped
+            try:
+                size = sum(f.stat().st_size for f in os.scandir(item.path))
+            except OSError:
+                continue
+            try:
+                last_used = os.stat(os.path.join(item.path, 'meta.json')).st_mtime
+            except OSError:
+                last_used = 0
+            entries.append((last_used, size, item.path))
+            total += size
+        for last_used, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        for item in os.scandir(self.cache_dir):
+            if item.is_dir():
+                shutil.rmtree(item.path, ignore_errors=True)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from curve_index import CurveIndex
+
+
+def brute_force_extremes(x, y, x_range):
+    # minimum and maximum of the visible points
+    visible = (x >= min(x_range)) & (x <= max(x_range))
+    return np.nanmin(y[visible]), np.nanmax(y[visible])
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_query_keeps_visible_extremes(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(10000, 200000))
+    x = np.cumsum(rng.uniform(0.5, 1.5, n))
+    y = np.cumsum(rng.normal(size=n))
+    y[rng.integers(0, n, n // 100)] = np.nan
+    index = CurveIndex(x, y)
+    for _ in range(50):
+        n_out = int(rng.integers(100, 5000))
+        a, b = np.sort(rng.uniform(x[0], x[-1], 2))
+        visible = (x >= a) & (x <= b)
+        if not np.any(visible & ~np.isnan(y)):
+            continue
+        positions = index.query(x, y, (a, b), n_out)
+        y_min, y_max = brute_force_extremes(x, y, (a, b))
+        drawn = y[positions[(x[positions] >= a) & (x[positions] <= b)]]
+        assert np.nanmin(drawn) == y_min
+        assert np.nanmax(drawn) == y_max
+        # the neighbours of the visible points are drawn as well
+        first, last = np.flatnonzero(visible)[[0, -1]]
+        assert max(0, first - 1) in positions and min(n - 1, last + 1) in positions
+        assert len(positions) <= 2 * n_out + 8
+
+
+def test_query_neighbour_does_not_hide_edge_extreme():
+    # the point left of the viewport is the largest of its bucket, the visible maximum is right next to it
+    x = np.arange(100000, dtype='float64')
+    y = np.zeros(100000)
+    y[4999] = 10.0
+    y[5000] = 5.0
+    index = CurveIndex(x, y)
+    positions = index.query(x, y, (5000, 90000), 100)
+    assert 5000 in positions and 4999 in positions
@@ -0,0 +1,170 @@
+import os
+import numpy as np
+import pytest
+import session_state
+from session_state import (SessionState, SessionStore, MemoryBackend, KeyValueBackend, LocalRedis, DiskClient,
+                           DiskBackend)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # time.time of session_state, advanced by the tests
+    now = [1.0e9]
+    monkeypatch.setattr(session_state.time, 'time', lambda: now[0])
+    return now
+
+
+def example_state():
+    state = SessionState()
+    state.save_file_to_file_list(['/data/run1/a.plt', '/data/run2/a.plt'], root='/data')
+    state.current_item_container = [['run1/a.plt'], 'time', 'anode TotalCurrent']
+    state.follow = {'/data/run1/a.plt': {'offset': 120, 'columns': ['time', 'v'], 'rest': [1.5], 'trace': 0}}
+    x = np.linspace(0, 1, 50)
+    state.data_container.add('C1', 'run1/a.plt_v', x, np.sin(x))
+    curve = state.data_container.add('C2', 'C2_calculation', x, np.cos(x))
+    curve.x_factor = 2.0
+    curve.y_factor = 1e3
+    curve.label = 'cos'
+    state.curve_save_counter = 3
+    return state
+
+
+def assert_same_state(a, b):
+    assert a.file_list == b.file_list
+    assert a.file_list_short == b.file_list_short
+    assert a.current_item_container == b.current_item_container
+    assert a.follow == b.follow
+    assert a.curve_save_counter == b.curve_save_counter
+    assert a.data_container.identifiers() == b.data_container.identifiers()
+    for identifier in a.data_container.identifiers():
+        ca, cb = a.data_container.get(identifier), b.data_container.get(identifier)
+        assert (ca.name, ca.label, ca.x_factor, ca.y_factor) == (cb.name, cb.label, cb.x_factor, cb.y_factor)
+        np.testing.assert_array_equal(ca.x, cb.x)
+        np.testing.assert_array_equal(ca.y, cb.y)
+
+
+@pytest.fixture(params=['redis', 'disk'])
+def key_value_backend(request, tmp_path):
+    if request.param == 'redis':
+        return KeyValueBackend(LocalRedis())
+    return DiskBackend(str(tmp_path / 'sessions'))
+
+
+def test_round_trip(key_value_backend):
+    state = example_state()
+    key_value_backend.set('s1', state)
+    # a fresh backend on the same store does not share the array cache
+    restored = KeyValueBackend(key_value_backend.client).get('s1')
+    assert_same_state(state, restored)
+    # the x grid shared by both curves is stored once
+    assert restored.data_container.get('C1').x is restored.data_container.get('C2').x
+    assert key_value_backend.get('unknown') is None
+
+
+def test_save_changes_keeps_changes_of_other_processes(key_value_backend):
+    # two worker processes share the store, each with its own SessionStore
+    store_a = SessionStore(key_value_backend)
+    store_b = SessionStore(KeyValueBackend(key_value_backend.client))
+    store_a.save('s1', example_state())
+
+    state_a = store_a.load('s1')
+    before = state_a.snapshot()
+    # meanwhile the other process removes a curve
+    state_b = store_b.load('s1')
+    state_b.data_container.remove('C1')
+    store_b.save('s1', state_b)
+    # the first process only changed the follow positions
+    state_a.follow = {}
+    assert store_a.save_changes('s1', state_a, before)
+
+    merged = store_b.load('s1')
+    assert merged.data_container.identifiers() == ['C2']
+    assert merged.follow == {}
+
+
+def test_unchanged_state_is_not_saved(monkeypatch):
+    client = LocalRedis()
+    store = SessionStore(KeyValueBackend(client))
+    store.save('s1', example_state())
+    writes = []
+    original_set = client.set
+    monkeypatch.setattr(client, 'set', lambda *args, **kwargs: writes.append(args[0]) or original_set(*args, **kwargs))
+
+    @store.with_state()
+    def read_only(value, state):
+        return len(state.data_container) + value
+
+    @store.with_state()
+    def change_label(state):
+        state.data_container.get('C2').label = 'new'
+
+    assert read_only(1, 's1') == 3
+    assert writes == []
+    change_label('s1')
+    assert writes == ['dash_plt:session:s1']
+    assert store.load('s1').data_container.get('C2').label == 'new'
+
+
+def test_memory_backend_evicts_idle_and_least_recently_used(clock):
+    backend = MemoryBackend(ttl=60, max_sessions=2)
+    backend.set('a', 'state a')
+    backend.set('b', 'state b')
+    clock[0] += 30
+    assert backend.get('a') == 'state a'
+    # 'b' is the least recently used one
+    backend.set('c', 'state c')
+    assert backend.get('b') is None
+    clock[0] += 45
+    # 'a' was last used 45 s ago
+    assert backend.get('a') == 'state a'
+    clock[0] += 59
+    assert backend.get('c') is None
+    assert backend.get('a') == 'state a'
+
+
+def test_local_redis_expiry(clock):
+    client = LocalRedis(sweep_interval=100)
+    client.set('k1', 'v', ex=10)
+    client.set('k2', 'v')
+    assert client.get('k1') == b'v'
+    clock[0] += 11
+    assert client.get('k1') is None and client.exists('k1') == 0
+    assert client.get('k2') == b'v'
+    client.set('k3', 'v', ex=5)
+    clock[0] += 200
+    # the sweep of the next write removes k3 without it being read
+    client.set('k4', 'v')
+    assert 'k3' not in client._data
+
+
+def test_disk_client_expiry(tmp_path, clock):
+    client = DiskClient(str(tmp_path), sweep_interval=100)
+    client.set('session:a', b'1', ex=10)
+    client.set('session:b', b'2')
+    client.set('array:c', b'3', ex=10)
+    assert client.get('session:a') == b'1'
+    assert client.expire('array:c', 1000) == 1
+    clock[0] += 11
+    assert client.get('session:a') is None
+    assert not os.path.exists(client._path('session:a'))
+    assert client.get('session:b') == b'2'
+    assert client.exists('array:c') == 1
+    assert client.expire('session:a', 10) == 0
+
+
+def test_disk_client_sweep(tmp_path, clock):
+    client = DiskClient(str(tmp_path), sweep_interval=100)
+    client.set('session:a', b'1', ex=10)
+    client.set('session:b', b'2', ex=1000)
+    clock[0] += 200
+    assert client.sweep() == 1
+    assert sorted(os.listdir(tmp_path)) == ['session_b']
+
+
+def test_disk_backend_session_expires(tmp_path, clock):
+    backend = DiskBackend(str(tmp_path), ttl=60)
+    backend.set('s1', example_state())
+    clock[0] += 30
+    assert backend.get('s1') is not None
+    clock[0] += 31
+    assert backend.get('s1') is None
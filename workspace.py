@@ -0,0 +1,103 @@
+import numpy as np
+import os
+import re
+import json
+import mmap
+from curve_store import CurveStore
+
+
+class WorkspaceError(ValueError):
+    pass
+
+
+# snapshot file: MAGIC, header length (8 bytes little endian), JSON header, then the curve arrays as little endian
+# float64, each starting at a multiple of ALIGNMENT. Arrays shared by several curves (e.g. the x grid of calculated
+# curves) are stored once
+MAGIC = b'DPLTWS01'
+ALIGNMENT = 64
+EXTENSION = '.workspace'
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_workspace(filename, curve_store, curve_save_counter):
+    # curves with identifiers, names, labels and factors plus the counter for the next identifier. The file is
+    # replaced atomically, so workspaces memory mapped from an older version of the file stay valid
+    arrays = {}
+    curves = []
+    for curve in curve_store:
+        for array in (curve.x, curve.y):
+            arrays.setdefault(id(array), (len(arrays), array))
+        curves.append({'identifier': curve.identifier, 'name': curve.name, 'label': curve.label,
+                       'x_factor': curve.x_factor, 'y_factor': curve.y_factor,
+                       'x': arrays[id(curve.x)][0], 'y': arrays[id(curve.y)][0]})
+    layout = []
+    offset = 0
+    for _, array in arrays.values():
+        layout.append({'offset': offset, 'length': len(array)})
+        offset = _aligned(offset + array.nbytes)
+    header = json.dumps({'version': 1, 'dtype': '<f8', 'curve_save_counter': curve_save_counter, 'curves': curves,
+                         'arrays': layout}).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    tmp_filename = f'{filename}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_filename, 'wb') as f:
+            f.write(MAGIC + len(header).to_bytes(8, 'little') + header)
+            for (_, array), entry in zip(arrays.values(), layout):
+                f.seek(data_start + entry['offset'])
+                f.write(np.ascontiguousarray(array, dtype='<f8').data)
+        os.replace(tmp_filename, filename)
+    except OSError:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
+    return data_start + offset
+
+
+def load_workspace(filename):
+    # curve_store.CurveStore of the snapshot and the curve_save_counter. The arrays are read-only views of the
+    # memory mapped file, pages are only read from disk when a curve is used
+    with open(filename, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise WorkspaceError(f'{filename}: not a workspace file')
+        header_length = int.from_bytes(f.read(8), 'little')
+        try:
+            header = json.loads(f.read(header_length))
+        except ValueError:
+            raise WorkspaceError(f'{filename}: damaged workspace header') from None
+        data_start = _aligned(len(MAGIC) + 8 + header_length)
+        size = os.fstat(f.fileno()).st_size
+        if any(data_start + a['offset'] + 8 * a['length'] > size for a in header['arrays']):
+            raise WorkspaceError(f'{filename}: workspace file is truncated')
+        # the map stays open as long as arrays of the workspace are referenced
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size > 0 else None
+    arrays = [np.frombuffer(mm, dtype=header['dtype'], count=a['length'], offset=data_start + a['offset'])
+              if a['length'] else np.empty(0) for a in header['arrays']]
+    curve_store = CurveStore()
+    for c in header['curves']:
+        curve = curve_store.add(c['identifier'], c['name'], arrays[c['x']], arrays[c['y']], c['label'])
+        curve.x_factor = c['x_factor']
+        curve.y_factor = c['y_factor']
+    return curve_store, header['curve_save_counter']
+
+
+def workspace_path(folder, name):
+    # snapshot file of a workspace name, only letters, digits, '-', '_' and '.' are kept
+    name = re.sub(r'[^\w.-]', '_', name.strip()).strip('.')
+    if not name:
+        raise WorkspaceError('no workspace name')
+    if not name.endswith(EXTENSION):
+        name += EXTENSION
+    return os.path.join(folder, name)
+
+
+def list_workspaces(folder):
+    # workspace names in folder, newest first
+    try:
+        items = [item for item in os.scandir(folder) if item.is_file() and item.name.endswith(EXTENSION)]
+    except OSError:
+        return []
+    return [item.name[:-len(EXTENSION)] for item in sorted(items, key=lambda i: i.stat().st_mtime, reverse=True)]